@@ -1,50 +1,95 @@
 import os
 import shutil
+import urllib.parse
 from gradio_client import Client
+from artifacts import as_artifact
+from clients import get_client, invalidate_client, get_session, HEALTH_CHECK_TIMEOUT
+from governor import governor
 
 # We connect to a public Space that hosts the model
 SPACE_ID = "multimodalart/stable-video-diffusion" 
+FALLBACK_SPACE_ID = "stabilityai/stable-video-diffusion-img2img-xt"
 
-def animate_image(image_path, hf_token=None, output_folder="assets/videos"):
+def build_space_client(space_id, hf_token=None):
+    """
+    Robustly handles client version differences.
+    """
+    try:
+        # Try with token (Newer versions)
+        return Client(space_id, hf_token=hf_token)
+    except TypeError:
+        # Try without token (Older versions or Public access)
+        print("      ⚠️ Token auth not supported by this client version. Connecting anonymously...")
+        return Client(space_id)
+
+def check_space_client(client):
+    """
+    Background probe of the Space's config endpoint (see ClientPool), so a restarted
+    or sleeping Space is usually rebuilt before a scene's predict fails over.
+    """
+    config_url = urllib.parse.urljoin(client.src.rstrip("/") + "/", "config")
+    headers = getattr(client, "headers", None) or {}
+    response = get_session(urllib.parse.urlparse(config_url).netloc).get(
+        config_url, headers=headers, timeout=HEALTH_CHECK_TIMEOUT
+    )
+    return response.status_code == 200
+
+def get_space_client(space_id, hf_token=None):
+    # Pooled so the Space config is fetched once, not once per image
+    return get_client(
+        "gradio",
+        space_id,
+        hf_token,
+        lambda: build_space_client(space_id, hf_token),
+        check_space_client
+    )
+
+def animate_image(image, hf_token=None, output_folder="assets/videos"):
     """
     Generates video using Gradio Client (Connects to HF Spaces).
     Robustly handles client version differences.
+    Accepts an image path or an in-memory image Artifact.
     """
+    image = as_artifact(image, "image")
+
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
         
-    filename = os.path.basename(image_path).replace(".jpg", ".mp4")
-    output_path = os.path.join(output_folder, filename)
+    # Named by content, never by file name: cached images are all called scene_{i}.jpg
+    output_path = os.path.join(output_folder, f"image_{image.content_hash()[:16]}.mp4")
     
     # Check cache
     if os.path.exists(output_path):
         return output_path
 
+    # The Space upload needs a file; in-memory images get a temp file for the call only
+    with image.local_path() as image_path:
+        return animate_path(image_path, output_path, hf_token)
+
+def animate_path(image_path, output_path, hf_token=None):
+    """
+    Sends an image file to the SVD Space and copies the result to output_path.
+    """
     print(f"   🎞️ Animating {os.path.basename(image_path)} via HF Spaces...")
     
-    # 1. Initialize Client (Try/Except for version compatibility)
+    # 1. Initialize Client (pooled, version compatible)
     try:
-        # Try with token (Newer versions)
-        client = Client(SPACE_ID, hf_token=hf_token)
-    except TypeError:
-        try:
-            # Try without token (Older versions or Public access)
-            print("      ⚠️ Token auth not supported by this client version. Connecting anonymously...")
-            client = Client(SPACE_ID)
-        except Exception as e:
-            print(f"      ❌ Client Init Failed: {e}")
-            return None
+        client = get_space_client(SPACE_ID, hf_token)
+    except Exception as e:
+        print(f"      ❌ Client Init Failed: {e}")
+        return None
 
     # 2. Generate Video
     try:
         # Predict: Send image to the Space
-        result = client.predict(
-            image_path, # Input Image
-            0.0,        # Motion bucket id
-            10,         # Frames per second
-            "0",        # Seed
-            api_name="/video" # The endpoint name
-        )
+        with governor.io.slot("svd"):
+            result = client.predict(
+                image_path, # Input Image
+                0.0,        # Motion bucket id
+                10,         # Frames per second
+                "0",        # Seed
+                api_name="/video" # The endpoint name
+            )
         
         # Handle result (path vs list)
         temp_video_path = result[0] if isinstance(result, (list, tuple)) else result
@@ -56,22 +101,23 @@ def animate_image(image_path, hf_token=None, output_folder="assets/videos"):
         
     except Exception as e:
         print(f"      ⚠️ SVD Error: {e}")
+        # Stale connection or Space restart: rebuild on next use
+        invalidate_client("gradio", SPACE_ID, hf_token)
         # Detailed fallback attempt
         try:
             print("      🔄 Trying fallback space...")
             # Fallback to StabilityAI official space
-            try:
-                client = Client("stabilityai/stable-video-diffusion-img2img-xt", hf_token=hf_token)
-            except:
-                client = Client("stabilityai/stable-video-diffusion-img2img-xt")
+            client = get_space_client(FALLBACK_SPACE_ID, hf_token)
                 
-            result = client.predict(image_path, "25", "25", "10", "14", api_name="/predict")
+            with governor.io.slot("svd"):
+                result = client.predict(image_path, "25", "25", "10", "14", api_name="/predict")
             
             temp_path = result['video'] if isinstance(result, dict) else result
             shutil.copy(temp_path, output_path)
             print("      ✅ Animation Success (Fallback)!")
             return output_path
         except:
+            invalidate_client("gradio", FALLBACK_SPACE_ID, hf_token)
             print("      👉 (Falling back to static zoom for this scene)")
             
     return None
\ No newline at end of file
@@ -1,11 +1,18 @@
+import os
 import streamlit as st
 from scraper import scrape_article
 from script_generator import generate_script
 from image_generator import generate_images
 from audio_generator import generate_voiceover
-from video_maker import create_video
 from animator import animate_image
 from topic_picker import get_trending_news, get_social_trends, find_news_url_for_tag
+from story_index import get_story_index, story_id_for
+from artifacts import as_artifact
+from variants import render_variants
+from renditions import OUTPUT_PROFILES
+from video_maker import create_video, FULL_SETTINGS, RENDER_VERSION
+from result_cache import get_result_cache
+from governor import governor
 
 st.set_page_config(page_title="AI Video Gen", page_icon="🎬", layout="wide")
 st.title("🎬 AI News Video Generator (Pro)")
@@ -15,6 +22,8 @@ if 'selected_url' not in st.session_state:
     st.session_state.selected_url = ""
 if 'selected_title' not in st.session_state:
     st.session_state.selected_title = ""
+if 'draft_job' not in st.session_state:
+    st.session_state.draft_job = None
 
 # ============================================================
 # SIDEBAR
@@ -37,7 +46,41 @@ with st.sidebar:
     with col2:
         gender = st.selectbox("Voice", ["Male", "Female"])
 
+    extra_languages = st.multiselect(
+        "Also publish in",
+        [lang for lang in ["English", "Hindi"] if lang != language],
+        help="Extra languages reuse the same visuals; only narration and captions differ."
+    )
+
+    output_profiles = st.multiselect(
+        "Output formats",
+        list(OUTPUT_PROFILES),
+        default=["landscape"],
+        help="Every format is rendered from the same single pass: 16:9, 9:16 Shorts/Reels, thumbnail and GIF teaser."
+    ) or ["landscape"]
+
     use_ai_video = st.toggle("Enable AI Motion (SVD)", value=False)
+    reuse_duplicates = st.toggle("Reuse near-duplicate stories", value=True)
+    word_captions = st.toggle("Word-synced captions", value=False)
+    draft_first = st.toggle("Draft preview first", value=False, help="Fast low-res preview; promote it to a full render without regenerating anything.")
+    use_cache = st.toggle("Reuse cached results", value=True)
+
+    with st.expander("🗄️ Cache"):
+        cache_stats = get_result_cache().stats()
+        st.caption(f"{cache_stats['entries']} entries · {cache_stats['bytes'] / 1024 ** 2:.1f} MB")
+        if st.button("Invalidate selected URL", use_container_width=True) and st.session_state.selected_url:
+            st.toast(f"Dropped {get_result_cache().invalidate(url=st.session_state.selected_url)} cache entries")
+            get_story_index().invalidate(url=st.session_state.selected_url)
+        if st.button("Clear cache", use_container_width=True):
+            st.toast(f"Dropped {get_result_cache().invalidate()} cache entries")
+            get_story_index().invalidate()
+
+    with st.expander("📊 Resource Governor"):
+        st.caption("Process-wide limits shared by all sessions.")
+        io_limit = st.number_input("I/O workers", min_value=1, value=governor.io.limit)
+        cpu_limit = st.number_input("CPU workers", min_value=1, value=governor.cpu.limit)
+        governor.configure(io_workers=io_limit, cpu_workers=cpu_limit)
+        st.json(governor.stats())
 
 # ============================================================
 # INPUT TABS
@@ -101,6 +144,78 @@ with tab3:
 
 st.divider()
 
+def show_output(path):
+    if not path:
+        return
+    if path.endswith(".mp4"):
+        st.video(path)
+    else:
+        st.image(path)
+
+def show_outputs(outputs):
+    for name, path in outputs.items():
+        if len(outputs) > 1:
+            st.write(f"### {name}")
+        show_output(path)
+
+def render_full(job, status):
+    """
+    Full render of every language variant from a job's upstream artifacts.
+    """
+    languages = [job["language"]] + job["extra_languages"]
+    if job["extra_languages"]:
+        status.write(f"🌐 Mixing Video: {', '.join(languages)}...")
+    else:
+        status.write("🎬 Mixing Video...")
+
+    story_id = story_id_for(job["article_data"])
+    # Landscape-only keeps the incremental segment cache; extra formats take the single-pass renderer
+    profiles = job["profiles"] if job["profiles"] != ["landscape"] else None
+    variants = render_variants(
+        job["media"],
+        job["script_data"],
+        job["language"],
+        languages,
+        job["gender"],
+        groq_key,
+        output_stem=os.path.join("output", f"video_{story_id}"),
+        base_audio=job["audio"],
+        word_captions=job["word_captions"],
+        profiles=profiles
+    )
+
+    outputs = {}
+    for lang, variant in variants.items():
+        outputs[lang] = variant["output"]
+        for profile, path in variant["renditions"].items():
+            if path and path != variant["output"]:
+                outputs[f"{lang}_{profile}"] = path
+    get_result_cache().put_result(job["render_key"], outputs, url=job["url"])
+
+    for lang, variant in variants.items():
+        if variant["output"]:
+            get_story_index().add(
+                job["article_data"],
+                language=lang,
+                url=job["url"],
+                video_path=variant["output"],
+                script=variant["script"],
+                render_settings=job["reuse_settings"],
+                outputs=outputs
+            )
+
+    status.update(label="✅ Video Ready!", state="complete", expanded=False)
+    st.balloons()
+    for lang, variant in variants.items():
+        if len(variants) > 1:
+            st.write(f"### {lang}")
+        show_output(variant["output"])
+        extras = [path for path in variant["renditions"].values() if path and path != variant["output"]]
+        if extras:
+            for col, path in zip(st.columns(len(extras)), extras):
+                with col:
+                    show_output(path)
+
 if st.session_state.selected_url:
     st.success(f"✅ Selected: **{st.session_state.selected_title}**")
     st.caption(f"Target URL: {st.session_state.selected_url}")
@@ -122,44 +237,155 @@ if st.session_state.selected_url:
                 status.update(label="❌ Scrape Failed", state="error")
                 st.stop()
 
+            # 1a. Exact rerun: same resolved URL, content and settings
+            cache = get_result_cache()
+            render_settings = {
+                "settings": FULL_SETTINGS,
+                "word_captions": word_captions,
+                "profiles": {name: OUTPUT_PROFILES[name] for name in output_profiles},
+                "version": RENDER_VERSION
+            }
+            render_key = cache.result_key(
+                article_data,
+                url=article_data.get("url", st.session_state.selected_url),
+                language=language,
+                extra_languages=extra_languages,
+                gender=gender,
+                ai_motion=use_ai_video,
+                render_settings=render_settings
+            )
+            # A duplicate's video only stands in for this run if it was made the same way
+            reuse_settings = {
+                "languages": [language] + sorted(extra_languages),
+                "gender": gender,
+                "ai_motion": use_ai_video,
+                "render": render_settings
+            }
+            cached_videos = cache.get_result(render_key) if use_cache else None
+            if cached_videos:
+                status.update(label="⚡ Served From Cache", state="complete", expanded=False)
+                show_outputs(cached_videos)
+                st.stop()
+
+            # 1b. Near-duplicate check against recently rendered stories
+            story_index = get_story_index()
+            duplicate, score = story_index.find_duplicate(
+                article_data,
+                language,
+                exclude_urls=(st.session_state.selected_url, article_data.get("url"))
+            )
+
+            if duplicate and reuse_duplicates:
+                status.write(f"♻️ Near-duplicate of \"{duplicate['title']}\" ({score:.0%} similar)")
+                # Every language and rendition of the earlier run, or nothing
+                reused = story_index.reusable_outputs(duplicate, reuse_settings) if use_cache else None
+                if reused:
+                    status.update(label="♻️ Reused Existing Video", state="complete", expanded=False)
+                    show_outputs(reused)
+                    st.stop()
+            elif duplicate:
+                st.warning(f"⚠️ Looks like a duplicate of \"{duplicate['title']}\" ({score:.0%} similar)")
+
             # 2. Script
-            status.write(f"⚡ Writing {language} Script...")
-            script_data = generate_script(article_data, groq_key, language)
+            script_data = cache.get_script(article_data, language) if use_cache else None
+            if script_data:
+                status.write("📜 Reusing Cached Script...")
+            elif use_cache and duplicate and reuse_duplicates and duplicate.get("script"):
+                status.write("📜 Reusing Existing Script...")
+                script_data = duplicate["script"]
+            else:
+                status.write(f"⚡ Writing {language} Script...")
+                script_data = generate_script(article_data, groq_key, language)
+                if script_data:
+                    cache.put_script(article_data, language, script_data, url=st.session_state.selected_url)
             with status.expander("📜 View Script"):
                 st.json(script_data)
 
             # 3. Audio
-            status.write(f"🎙️ Generating {gender} Voice...")
-            audio_paths = generate_voiceover(script_data, language, gender)
+            audio_items = cache.get_audio(script_data, language, gender) if use_cache else None
+            if audio_items:
+                status.write("🎙️ Reusing Cached Voice...")
+            else:
+                status.write(f"🎙️ Generating {gender} Voice...")
+                audio_items = generate_voiceover(script_data, language, gender, persist=False, return_artifacts=True)
+                cache.put_audio(script_data, language, gender, audio_items, url=st.session_state.selected_url)
 
             # 4. Images (UPDATED CALL)
-            status.write("🎨 Generating Images...")
-            image_paths = generate_images(
-                script_data,
-                hf_token=hf_key or None,
-                cf_account_id=cf_account_id or None,
-                cf_api_token=cf_api_token or None,
-                pollinations_api_key=pollinations_key or None
-            )
+            images = cache.get_images(script_data) if use_cache else None
+            if images:
+                status.write("🎨 Reusing Cached Images...")
+            else:
+                status.write("🎨 Generating Images...")
+                # Images stay in memory and are handed straight to the renderer
+                images = generate_images(
+                    script_data,
+                    hf_token=hf_key or None,
+                    cf_account_id=cf_account_id or None,
+                    cf_api_token=cf_api_token or None,
+                    pollinations_api_key=pollinations_key or None,
+                    persist=False,
+                    return_artifacts=True
+                )
+                cache.put_images(script_data, images, url=st.session_state.selected_url)
 
             # 5. Animation
-            final_media = image_paths
+            final_media = images
             if use_ai_video:
                 status.write("🎞️ Animating (SVD)...")
                 videos = []
-                for img in image_paths:
+                for img in images:
                     vid = animate_image(img, hf_key) if img else None
-                    videos.append(vid if vid else img)
+                    videos.append(as_artifact(vid, "video") if vid else img)
                 final_media = videos
 
-            # 6. Assemble
-            status.write("🎬 Mixing Video...")
-            output = create_video(final_media, audio_paths, script_data)
+            # Everything upstream of the renderer, kept for draft promotion
+            job = {
+                "article_data": article_data,
+                "script_data": script_data,
+                "audio": audio_items,
+                "media": final_media,
+                "language": language,
+                "extra_languages": extra_languages,
+                "gender": gender,
+                "word_captions": word_captions,
+                "profiles": output_profiles,
+                "url": st.session_state.selected_url,
+                "render_key": render_key,
+                "reuse_settings": reuse_settings
+            }
 
-            status.update(label="✅ Video Ready!", state="complete", expanded=False)
-            st.balloons()
-            st.video(output)
+            # 6. Assemble (one render per language over the shared visuals)
+            if draft_first:
+                status.write("📝 Rendering Draft Preview...")
+                job["draft_video"] = create_video(
+                    final_media,
+                    audio_items,
+                    script_data,
+                    output_file=os.path.join("output", f"draft_{story_id_for(article_data)}.mp4"),
+                    draft=True
+                )
+                st.session_state.draft_job = job
+                status.update(label="📝 Draft Ready!", state="complete", expanded=False)
+            else:
+                st.session_state.draft_job = None
+                render_full(job, status)
 
         except Exception as e:
             status.update(label="❌ Error", state="error")
             st.error(f"Error: {e}")
+
+    # --- DRAFT PREVIEW / PROMOTION ---
+    job = st.session_state.draft_job
+    if job and job["url"] == st.session_state.selected_url:
+        st.write("### 📝 Draft Preview")
+        if job["draft_video"]:
+            st.video(job["draft_video"])
+
+        if st.button("⬆️ Promote to Full Render", use_container_width=True):
+            status = st.status("🚀 Rendering Full Video...", expanded=True)
+            try:
+                render_full(job, status)
+                st.session_state.draft_job = None
+            except Exception as e:
+                status.update(label="❌ Error", state="error")
+                st.error(f"Error: {e}")
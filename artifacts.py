@@ -0,0 +1,147 @@
+import io
+import os
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager, ExitStack
+import numpy as np
+from PIL import Image
+
+# ============================================================
+# IN-MEMORY ARTIFACTS
+# ============================================================
+
+EXTENSIONS = {
+    "JPEG": ".jpg",
+    "PNG": ".png",
+    "MP3": ".mp3",
+    "MP4": ".mp4"
+}
+
+class Artifact:
+    """
+    Media handed directly between pipeline stages.
+    Holds encoded bytes and/or a decoded RGB array plus metadata;
+    writing to disk is optional persistence, not the transport.
+    """
+    def __init__(self, kind, data=None, array=None, path=None, fmt=None, metadata=None):
+        self.kind = kind            # "image", "audio" or "video"
+        self.data = data            # encoded bytes
+        self.array = array          # decoded HxWx3 uint8 (images only)
+        self.path = path            # set once persisted
+        self.fmt = fmt              # "JPEG", "MP3", ...
+        self.metadata = metadata or {}
+        self._temp_refs = 0         # open local_path() scopes using a temp copy
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_path(cls, path, kind):
+        ext = os.path.splitext(path)[1].lower()
+        fmt = next((f for f, e in EXTENSIONS.items() if e == ext), None)
+        return cls(kind, path=path, fmt=fmt)
+
+    @classmethod
+    def from_image(cls, image, fmt="JPEG", metadata=None):
+        return cls("image", array=np.asarray(image.convert("RGB")), fmt=fmt, metadata=metadata)
+
+    def exists(self):
+        return (
+            self.data is not None
+            or self.array is not None
+            or (self.path is not None and os.path.exists(self.path))
+        )
+
+    def to_bytes(self):
+        if self.data is None:
+            if self.array is not None:
+                buffer = io.BytesIO()
+                Image.fromarray(self.array).save(buffer, format=self.fmt or "JPEG", quality=92)
+                self.data = buffer.getvalue()
+            elif self.path:
+                with open(self.path, "rb") as f:
+                    self.data = f.read()
+        return self.data
+
+    def to_array(self):
+        """
+        Decoded RGB array, decoded at most once per artifact.
+        """
+        if self.array is None:
+            source = io.BytesIO(self.data) if self.data is not None else self.path
+            with Image.open(source) as img:
+                self.array = np.asarray(img.convert("RGB"))
+        return self.array
+
+    def content_hash(self):
+        """
+        Stable digest of the content: decoded pixels for images (so it does
+        not depend on whether the JPEG has been encoded yet), bytes otherwise.
+        """
+        if "sha1" not in self.metadata:
+            payload = self.to_array().tobytes() if self.kind == "image" else self.to_bytes()
+            self.metadata["sha1"] = hashlib.sha1(payload).hexdigest()
+        return self.metadata["sha1"]
+
+    def to_image(self):
+        return Image.fromarray(self.to_array())
+
+    def persist(self, path=None):
+        """
+        Writes the artifact to disk (a temp file if no path is given) and returns the path.
+        Temp files made here are the caller's to delete; stages should use local_path().
+        """
+        if path is None:
+            if self.path and os.path.exists(self.path):
+                return self.path
+            fd, path = tempfile.mkstemp(suffix=EXTENSIONS.get(self.fmt, ""), prefix=f"{self.kind}_")
+            os.close(fd)
+        elif self.path == path and os.path.exists(path):
+            return path
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+        self.path = path
+        return path
+
+    @contextmanager
+    def local_path(self):
+        """
+        Path on disk for the duration of the block, for tools that only read files
+        (ffmpeg, Gradio uploads). A temp copy made for it is shared by overlapping
+        scopes and removed when the last one exits; a real persisted file is left alone.
+        """
+        with self._lock:
+            if self._temp_refs == 0 and self.path and os.path.exists(self.path):
+                path, owned = self.path, False
+            else:
+                if self._temp_refs == 0:
+                    self.persist()
+                self._temp_refs += 1
+                path, owned = self.path, True
+        try:
+            yield path
+        finally:
+            if owned:
+                with self._lock:
+                    self._temp_refs -= 1
+                    if self._temp_refs == 0:
+                        if os.path.exists(path):
+                            os.remove(path)
+                        self.path = None
+
+@contextmanager
+def local_paths(items):
+    """
+    local_path() over several artifacts at once; None items yield None.
+    """
+    with ExitStack() as stack:
+        yield [stack.enter_context(item.local_path()) if item is not None else None for item in items]
+
+def as_artifact(item, kind):
+    """
+    Accepts an Artifact, a file path or None, so stages work with either.
+    """
+    if item is None or isinstance(item, Artifact):
+        return item
+    return Artifact.from_path(item, kind)
@@ -1,6 +1,10 @@
 import edge_tts
 import asyncio
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+from artifacts import Artifact
+from governor import governor
 
 # Voice Database
 VOICE_MAP = {
@@ -14,41 +18,91 @@ VOICE_MAP = {
     }
 }
 
-async def generate_single_voice(text, filename, voice):
-    communicate = edge_tts.Communicate(text, voice)
-    await communicate.save(filename)
+# edge-tts default output: audio-24khz-48kbitrate-mono-mp3 (constant bitrate)
+MP3_BITRATE = 48000
+TICKS_PER_SECOND = 10_000_000   # WordBoundary offsets are in 100ns units
 
-def generate_voiceover(script_data, language, gender, output_folder="assets/audio"):
+def timing_path_for(audio_path):
+    return os.path.splitext(audio_path)[0] + ".json"
+
+def load_timing(audio_path):
+    """
+    Reads the timing record saved next to a voice file, if any.
+    """
+    try:
+        with open(timing_path_for(audio_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+async def generate_single_voice(text, voice):
+    """
+    Streams synthesized speech into memory.
+    Returns (mp3 bytes, timing) where timing holds the duration and the
+    WordBoundary offsets edge-tts emits during synthesis.
+    """
+    try:
+        # Newer edge-tts only emits sentence boundaries unless asked
+        communicate = edge_tts.Communicate(text, voice, boundary="WordBoundary")
+    except TypeError:
+        communicate = edge_tts.Communicate(text, voice)
+
+    chunks = []
+    words = []
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            chunks.append(chunk["data"])
+        elif chunk["type"] == "WordBoundary":
+            start = chunk["offset"] / TICKS_PER_SECOND
+            words.append({
+                "text": chunk["text"],
+                "start": round(start, 3),
+                "end": round(start + chunk["duration"] / TICKS_PER_SECOND, 3)
+            })
+
+    audio_bytes = b"".join(chunks)
+    duration = len(audio_bytes) * 8 / MP3_BITRATE
+    if words:
+        duration = max(duration, words[-1]["end"])
+
+    return audio_bytes, {"duration": round(duration, 3), "words": words}
+
+def generate_voiceover(script_data, language, gender, output_folder="assets/audio", persist=True, return_artifacts=False):
     """
     Generates voiceovers based on Language AND Gender.
+    Returns file paths by default, or in-memory Artifacts with
+    return_artifacts=True (persisted to output_folder only if persist=True).
     """
-    if not os.path.exists(output_folder):
+    if persist and not os.path.exists(output_folder):
         os.makedirs(output_folder)
         
-    audio_paths = []
-    
     # Select Voice
     try:
         selected_voice = VOICE_MAP[language][gender]
     except:
         selected_voice = "en-US-BrianNeural" # Fallback
     
-    # Create loop
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    
     print(f"🎙️ Generating Audio: {language} | {gender} ({selected_voice})...")
     
-    for index, scene in enumerate(script_data['scenes']):
+    def synthesize(index, scene):
         text = scene['narration']
         filename = os.path.join(output_folder, f"voice_{index}.mp3")
         
         try:
-            loop.run_until_complete(generate_single_voice(text, filename, selected_voice))
-            audio_paths.append(filename)
+            # Own event loop per worker thread; the governor caps concurrent TTS calls
+            with governor.io.slot("tts"):
+                audio_bytes, timing = asyncio.run(generate_single_voice(text, selected_voice))
+            artifact = Artifact("audio", data=audio_bytes, fmt="MP3", metadata={"voice": selected_voice, "timing": timing})
+            if persist:
+                artifact.persist(filename)
+                with open(timing_path_for(filename), "w", encoding="utf-8") as f:
+                    json.dump(timing, f, ensure_ascii=False)
+            return artifact if return_artifacts else artifact.path
         except Exception as e:
             print(f"   ❌ Audio Error: {e}")
-            audio_paths.append(None)
+            return None
             
-    loop.close()
-    return audio_paths
\ No newline at end of file
+    scenes = script_data['scenes']
+    with ThreadPoolExecutor(max_workers=max(1, len(scenes))) as executor:
+        audio_items = list(executor.map(synthesize, range(len(scenes)), scenes))
+    return audio_items
\ No newline at end of file
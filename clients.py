@@ -0,0 +1,161 @@
+import time
+import hashlib
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# ============================================================
+# SHARED CLIENT REGISTRY
+# ============================================================
+
+IDLE_TTL = 600                # seconds before an unused client is evicted
+HEALTH_CHECK_INTERVAL = 60    # seconds between background health checks / idle sweeps
+HTTP_POOL_SIZE = 16           # keep-alive connections per host
+HEALTH_CHECK_TIMEOUT = 5      # seconds; health probes must stay cheap
+
+def credential_fingerprint(credential):
+    # Keys never hold the raw secret
+    if not credential:
+        return None
+    return hashlib.sha256(credential.encode("utf-8")).hexdigest()[:16]
+
+class ClientPool:
+    """
+    Process-wide registry of API clients keyed by (kind, endpoint, credential).
+    Module globals survive Streamlit reruns, so clients are built once and
+    reused across threads and sessions. A background reaper evicts idle
+    clients and health-checks the rest, so get() never waits on a probe;
+    unhealthy clients are dropped and rebuilt on next use.
+    """
+    def __init__(self, idle_ttl=IDLE_TTL, health_check_interval=HEALTH_CHECK_INTERVAL):
+        self.idle_ttl = idle_ttl
+        self.health_check_interval = health_check_interval
+        self.entries = {}
+        self.key_locks = {}
+        self.lock = threading.Lock()
+        self.reaper = None
+
+    def _close(self, client):
+        close = getattr(client, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception:
+                pass
+
+    def evict_idle(self):
+        now = time.time()
+        with self.lock:
+            stale = [k for k, e in self.entries.items() if now - e["last_used"] > self.idle_ttl]
+            evicted = [self.entries.pop(k)["client"] for k in stale]
+        for client in evicted:
+            self._close(client)
+
+    def check_health(self):
+        """
+        Probes every pooled client that registered a health check and drops
+        the unhealthy ones. Runs on the reaper thread, off the request path.
+        """
+        now = time.time()
+        with self.lock:
+            due = [
+                (key, e) for key, e in self.entries.items()
+                if e["health_check"] and now - e["last_checked"] > self.health_check_interval
+            ]
+        for key, entry in due:
+            try:
+                healthy = entry["health_check"](entry["client"])
+            except Exception:
+                healthy = False
+            entry["last_checked"] = time.time()
+            if not healthy:
+                print(f"   ♻️ Dropping unhealthy {key[0]} client")
+                with self.lock:
+                    # Only if it was not already replaced meanwhile
+                    if self.entries.get(key) is entry:
+                        del self.entries[key]
+                    else:
+                        continue
+                self._close(entry["client"])
+
+    def _reap(self):
+        while True:
+            time.sleep(self.health_check_interval)
+            try:
+                self.evict_idle()
+                self.check_health()
+            except Exception as e:
+                print(f"⚠️ Client reaper error: {e}")
+
+    def _ensure_reaper(self):
+        with self.lock:
+            if self.reaper is None:
+                self.reaper = threading.Thread(target=self._reap, name="client-reaper", daemon=True)
+                self.reaper.start()
+
+    def get(self, kind, endpoint, credential, factory, health_check=None):
+        """
+        Returns the pooled client for this key, building it with factory() if needed.
+        health_check(client) -> bool is run periodically in the background.
+        """
+        key = (kind, endpoint, credential_fingerprint(credential))
+        self._ensure_reaper()
+
+        with self.lock:
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+
+        # Per-key lock: a slow build (e.g. Gradio config fetch) only blocks its own key
+        with key_lock:
+            now = time.time()
+            with self.lock:
+                entry = self.entries.get(key)
+
+            if entry is None:
+                entry = {
+                    "client": factory(),
+                    "health_check": health_check,
+                    "created": now,
+                    "last_checked": now,
+                    "last_used": now
+                }
+                with self.lock:
+                    self.entries[key] = entry
+
+            entry["last_used"] = now
+            return entry["client"]
+
+    def invalidate(self, kind, endpoint, credential=None):
+        """
+        Drops a client (e.g. after a connection error) so the next get() rebuilds it.
+        """
+        key = (kind, endpoint, credential_fingerprint(credential))
+        with self.lock:
+            entry = self.entries.pop(key, None)
+        if entry:
+            self._close(entry["client"])
+
+    def stats(self):
+        with self.lock:
+            return {f"{kind}:{endpoint}": round(time.time() - e["last_used"], 1) for (kind, endpoint, _), e in self.entries.items()}
+
+pool = ClientPool()
+
+def get_client(kind, endpoint, credential, factory, health_check=None):
+    return pool.get(kind, endpoint, credential, factory, health_check)
+
+def invalidate_client(kind, endpoint, credential=None):
+    pool.invalidate(kind, endpoint, credential)
+
+def build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_session(host):
+    """
+    Keep-alive HTTP session for a host; auth headers stay per request.
+    No health check: urllib3 already replaces dropped connections.
+    """
+    return get_client("http", host, None, build_session)
@@ -0,0 +1,115 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+# ============================================================
+# LIMITS (override via environment)
+# ============================================================
+
+# Network-bound calls: scrape, LLM, TTS, image backends, SVD
+IO_WORKERS = int(os.getenv("GOVERNOR_IO_WORKERS", "16"))
+# CPU-bound work: image decode/resize, video encodes (each also runs an ffmpeg process)
+CPU_WORKERS = int(os.getenv("GOVERNOR_CPU_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+
+class WorkPool:
+    """
+    Process-wide concurrency limit with queue-depth metrics.
+    Callers keep their own threads and only hold a slot around the actual
+    work, so slots must not be nested within the same pool.
+    """
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self.active = 0              # slots held (weighted)
+        self.running = 0             # tasks holding slots
+        self.waiting = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.by_label = {}
+        self.cond = threading.Condition()
+        self.local = threading.local()
+
+    def set_limit(self, limit):
+        with self.cond:
+            self.limit = max(1, int(limit))
+            self.cond.notify_all()
+
+    def has_capacity(self):
+        with self.cond:
+            return self.active < self.limit and not self.waiting
+
+    def on_next_acquire(self, callback):
+        """
+        One-shot callback run when the current thread next gets a slot
+        (e.g. to time a request from when it actually starts). None clears it.
+        """
+        self.local.on_acquire = callback
+
+    @contextmanager
+    def slot(self, label="task", weight=1):
+        """
+        Holds `weight` slots (e.g. one per encoder process a task runs),
+        capped at the pool limit so a heavy task can still run alone.
+        """
+        start = time.time()
+        with self.cond:
+            self.waiting += 1
+            while self.active + min(weight, self.limit) > self.limit:
+                self.cond.wait()
+            weight = min(weight, self.limit)
+            self.waiting -= 1
+            self.active += weight
+            self.running += 1
+            self.total_wait += time.time() - start
+            self.by_label[label] = self.by_label.get(label, 0) + weight
+        callback = getattr(self.local, "on_acquire", None)
+        if callback:
+            self.local.on_acquire = None
+            callback()
+        try:
+            yield
+        finally:
+            with self.cond:
+                self.active -= weight
+                self.running -= 1
+                self.completed += 1
+                self.by_label[label] -= weight
+                # Freed slots may satisfy several lighter waiters
+                self.cond.notify_all()
+
+    def run(self, label, fn, *args, **kwargs):
+        with self.slot(label):
+            return fn(*args, **kwargs)
+
+    def stats(self):
+        with self.cond:
+            started = self.completed + self.running
+            return {
+                "limit": self.limit,
+                "active": self.active,
+                "queued": self.waiting,
+                "completed": self.completed,
+                "avg_wait_s": round(self.total_wait / started, 3) if started else 0.0,
+                "active_by_label": {k: v for k, v in self.by_label.items() if v}
+            }
+
+class Governor:
+    """
+    Separate pools for I/O-bound and CPU-bound work, shared by every
+    Streamlit session in the process.
+    """
+    def __init__(self, io_workers=IO_WORKERS, cpu_workers=CPU_WORKERS):
+        self.io = WorkPool("io", io_workers)
+        self.cpu = WorkPool("cpu", cpu_workers)
+
+    def configure(self, io_workers=None, cpu_workers=None):
+        if io_workers:
+            self.io.set_limit(io_workers)
+        if cpu_workers:
+            self.cpu.set_limit(cpu_workers)
+
+    def stats(self):
+        return {"io": self.io.stats(), "cpu": self.cpu.stats()}
+
+governor = Governor()
@@ -1,11 +1,14 @@
+import io
 import os
-import requests
 import random
 import urllib.parse
 import time
 import threading
-from PIL import Image
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from PIL import Image, ImageOps
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from artifacts import Artifact
+from clients import get_session
+from governor import governor
 
 # ============================================================
 # GLOBAL LOCK (Pollinations still prefers serialized access)
@@ -35,22 +38,45 @@ def build_prompt(scene_prompt, style_seed):
     )
 
 # ============================================================
-# FALLBACK PLACEHOLDER
+# INGEST NORMALIZATION
 # ============================================================
 
-def generate_placeholder(output_path):
+RENDER_SIZE = (1280, 720)
+ZOOM_RATE = 0.04        # max Ken Burns zoom per second (video_maker); slower for long scenes
+ZOOM_HEADROOM = 0.25    # extra resolution so the zoom only ever downsamples
+
+NORMALIZED_SIZE = (
+    round(RENDER_SIZE[0] * (1 + ZOOM_HEADROOM)),
+    round(RENDER_SIZE[1] * (1 + ZOOM_HEADROOM))
+)
+
+def normalize_image(image_bytes, size=NORMALIZED_SIZE):
+    """
+    Decodes, resizes and center-crops backend bytes exactly once to the
+    render canvas plus zoom headroom. Returns an image Artifact or None.
+    """
     try:
-        img = Image.new("RGB", (1280, 720), color=(15, 20, 40))
-        img.save(output_path)
-        return True
-    except:
-        return False
+        with governor.cpu.slot("decode"):
+            with Image.open(io.BytesIO(image_bytes)) as img:
+                img = ImageOps.fit(img.convert("RGB"), size, method=Image.LANCZOS)
+            return Artifact.from_image(img, fmt="JPEG")
+    except Exception as e:
+        print(f"         ❌ Normalize error: {e}")
+        return None
 
 # ============================================================
-# IMAGE GENERATORS
+# FALLBACK PLACEHOLDER
 # ============================================================
 
-def generate_with_huggingface(prompt, output_path, hf_token):
+def generate_placeholder():
+    img = Image.new("RGB", NORMALIZED_SIZE, color=(15, 20, 40))
+    return Artifact.from_image(img, fmt="JPEG")
+
+# ============================================================
+# IMAGE GENERATORS (return encoded bytes or None)
+# ============================================================
+
+def generate_with_huggingface(prompt, hf_token):
     print("      🟣 HuggingFace (SDXL)")
     API_URL = "https://api-inference.huggingface.co/models/stabilityai/stable-diffusion-xl-base-1.0"
 
@@ -65,18 +91,17 @@ def generate_with_huggingface(prompt, output_path, hf_token):
     }
 
     try:
-        response = requests.post(API_URL, headers=headers, json=payload, timeout=90)
+        with governor.io.slot("image"):
+            response = get_session("api-inference.huggingface.co").post(API_URL, headers=headers, json=payload, timeout=90)
         if response.status_code == 200 and response.headers.get("content-type", "").startswith("image"):
-            with open(output_path, "wb") as f:
-                f.write(response.content)
-            return True
+            return response.content
     except Exception as e:
         print(f"         ❌ HF error: {e}")
 
-    return False
+    return None
 
 
-def generate_with_cloudflare(prompt, output_path, cf_account_id, cf_api_token):
+def generate_with_cloudflare(prompt, cf_account_id, cf_api_token):
     print("      🟠 Cloudflare Workers AI")
 
     url = f"https://api.cloudflare.com/client/v4/accounts/{cf_account_id}/ai/run/@cf/stabilityai/stable-diffusion-xl-base-1.0"
@@ -93,19 +118,20 @@ def generate_with_cloudflare(prompt, output_path, cf_account_id, cf_api_token):
     }
 
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=60)
+        with governor.io.slot("image"):
+            response = get_session("api.cloudflare.com").post(url, headers=headers, json=payload, timeout=60)
         if response.status_code == 200:
-            image_bytes = response.json()["result"]["image"]
-            with open(output_path, "wb") as f:
-                f.write(bytes(image_bytes))
-            return True
+            # Binary responses skip the JSON integer-list round-trip entirely
+            if response.headers.get("content-type", "").startswith("image"):
+                return response.content
+            return bytes(response.json()["result"]["image"])
     except Exception as e:
         print(f"         ❌ CF error: {e}")
 
-    return False
+    return None
 
 
-def generate_with_pollinations(prompt, output_path, seed, pollinations_api_key):
+def generate_with_pollinations(prompt, seed, pollinations_api_key):
     print("      🔵 Pollinations AI (Keyed)")
 
     encoded = urllib.parse.quote(prompt)
@@ -122,17 +148,178 @@ def generate_with_pollinations(prompt, output_path, seed, pollinations_api_key):
     with pollinations_lock:
         for attempt in range(3):
             try:
-                response = requests.get(url, headers=headers, timeout=60)
+                with governor.io.slot("image"):
+                    response = get_session("image.pollinations.ai").get(url, headers=headers, timeout=60)
                 if response.status_code == 200 and len(response.content) > 5000:
-                    with open(output_path, "wb") as f:
-                        f.write(response.content)
-
                     time.sleep(0.6)  # smaller cooldown with key
-                    return True
+                    return response.content
             except:
                 time.sleep(1.5)
 
-        return False
+        return None
+
+# ============================================================
+# HEDGED REQUESTS
+# ============================================================
+
+HEDGE_PERCENTILE = 0.9       # hedge once the primary is slower than this percentile
+HEDGE_DEFAULT_DELAY = 20.0   # seconds, until a backend has enough latency samples
+HEDGE_MIN_SAMPLES = 5
+HEDGE_BUDGET_RATIO = 0.2     # extra requests allowed per primary request, process-wide
+
+class LatencyTracker:
+    """
+    Rolling window of successful request latencies per backend.
+    """
+    def __init__(self, window=50):
+        self.samples = {}
+        self.window = window
+        self.lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self.lock:
+            history = self.samples.setdefault(name, [])
+            history.append(seconds)
+            del history[:-self.window]
+
+    def percentile(self, name, p=HEDGE_PERCENTILE):
+        with self.lock:
+            history = sorted(self.samples.get(name, []))
+        if len(history) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return history[min(len(history) - 1, int(p * len(history)))]
+
+class HedgeBudget:
+    """
+    Global cap on extra spend: hedged requests may not exceed
+    HEDGE_BUDGET_RATIO of primary requests (plus one to get started).
+    """
+    def __init__(self, ratio=HEDGE_BUDGET_RATIO):
+        self.ratio = ratio
+        self.primary = 0
+        self.hedged = 0
+        self.lock = threading.Lock()
+
+    def record_primary(self):
+        with self.lock:
+            self.primary += 1
+
+    def try_spend(self):
+        with self.lock:
+            if self.hedged < self.ratio * self.primary + 1:
+                self.hedged += 1
+                return True
+            return False
+
+latency_tracker = LatencyTracker()
+hedge_budget = HedgeBudget()
+
+def timed_attempt(name, fetch, started=None):
+    """
+    Runs one backend. Timing starts when its request gets an I/O slot, not
+    while it waits for one; `started` (an Event) is set at that point too.
+    """
+    times = {}
+
+    def mark_started():
+        times.setdefault("start", time.time())
+        if started is not None:
+            started.set()
+
+    governor.io.on_next_acquire(mark_started)
+    try:
+        image_bytes = fetch()
+    finally:
+        governor.io.on_next_acquire(None)
+        # A backend that never reached the network still counts as started
+        mark_started()
+    # A backend only counts if its image also survives normalization
+    artifact = normalize_image(image_bytes) if image_bytes else None
+    if artifact:
+        latency_tracker.record(name, time.time() - times["start"])
+    return name, artifact
+
+def start_attempt(name, fetch, started):
+    """
+    Runs timed_attempt on its own thread and returns its Future.
+    Hedges never queue behind the requests they race (the I/O governor
+    still caps concurrency); losers cannot be aborted and just finish.
+    """
+    future = Future()
+
+    def run():
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(timed_attempt(name, fetch, started))
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=f"hedge-{name}", daemon=True).start()
+    return future
+
+def run_hedged(backends):
+    """
+    Starts the primary backend; if it has not answered within its latency
+    percentile of starting its request, fires the next backend in parallel
+    (budget permitting).
+    A failed backend fails over immediately. First valid image wins.
+    Returns (engine, artifact) or (None, None).
+    """
+    hedge_budget.record_primary()
+    queue = list(backends)
+    pending = {}
+    latest = {}
+
+    def launch():
+        name, fetch = queue.pop(0)
+        started = threading.Event()
+        pending[start_attempt(name, fetch, started)] = name
+        latest.update(name=name, started=started, delay=latency_tracker.percentile(name), since=None)
+
+    launch()
+    hedging = True
+    while pending:
+        timeout = None
+        if queue and hedging:
+            if latest["since"] is None and latest["started"].is_set():
+                latest["since"] = time.time()
+            if latest["since"] is None:
+                # Hedge timer starts once the latest attempt is actually running
+                timeout = 0.05
+            else:
+                timeout = max(0.0, latest["since"] + latest["delay"] - time.time())
+
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+        if not done:
+            if latest["since"] is None or time.time() < latest["since"] + latest["delay"]:
+                continue
+            if not governor.io.has_capacity():
+                # A hedge would only queue behind the requests it races; check again shortly
+                latest["since"] = time.time() - latest["delay"] + 0.25
+                continue
+            if hedge_budget.try_spend():
+                print(f"      ⏱️ {latest['name']} slow, hedging with {queue[0][0]}")
+                launch()
+            else:
+                hedging = False
+            continue
+
+        for future in done:
+            pending.pop(future)
+            try:
+                name, artifact = future.result()
+            except Exception as e:
+                print(f"         ❌ Backend error: {e}")
+                continue
+            if artifact:
+                return name, artifact
+
+        # Everything in flight failed: fail over without spending hedge budget
+        if not pending and queue:
+            launch()
+
+    return None, None
 
 # ============================================================
 # AUTO-SWITCH ENGINE
@@ -145,22 +332,38 @@ def generate_image(
     hf_token=None,
     cf_account_id=None,
     cf_api_token=None,
-    pollinations_api_key=None
+    pollinations_api_key=None,
+    hedge=True
 ):
+    """
+    Returns (engine, artifact). The artifact holds the normalized, decoded
+    image and is written to output_path only when one is given.
+    With hedge=True slow backends are raced against the next one in line.
+    """
+    backends = []
     if hf_token:
-        if generate_with_huggingface(prompt, output_path, hf_token):
-            return "HuggingFace"
-
+        backends.append(("HuggingFace", lambda: generate_with_huggingface(prompt, hf_token)))
     if cf_account_id and cf_api_token:
-        if generate_with_cloudflare(prompt, output_path, cf_account_id, cf_api_token):
-            return "Cloudflare"
-
+        backends.append(("Cloudflare", lambda: generate_with_cloudflare(prompt, cf_account_id, cf_api_token)))
     if pollinations_api_key:
-        if generate_with_pollinations(prompt, output_path, seed, pollinations_api_key):
-            return "Pollinations"
+        backends.append(("Pollinations", lambda: generate_with_pollinations(prompt, seed, pollinations_api_key)))
+
+    engine, artifact = None, None
+    if hedge and len(backends) > 1:
+        engine, artifact = run_hedged(backends)
+    else:
+        for name, fetch in backends:
+            engine, artifact = timed_attempt(name, fetch)
+            if artifact:
+                break
+
+    if artifact is None:
+        engine, artifact = "Placeholder", generate_placeholder()
 
-    generate_placeholder(output_path)
-    return "Placeholder"
+    artifact.metadata.update({"engine": engine, "prompt": prompt, "seed": seed})
+    if output_path:
+        artifact.persist(output_path)
+    return engine, artifact
 
 # ============================================================
 # MAIN ENTRY POINT
@@ -172,38 +375,46 @@ def generate_images(
     hf_token=None,
     cf_account_id=None,
     cf_api_token=None,
-    pollinations_api_key=None
+    pollinations_api_key=None,
+    persist=True,
+    return_artifacts=False,
+    hedge=True
 ):
-    os.makedirs(output_folder, exist_ok=True)
-    image_paths = [None] * len(script_data["scenes"])
+    """
+    Generates one normalized image per scene.
+    Returns file paths by default, or in-memory Artifacts with
+    return_artifacts=True (persisted to output_folder only if persist=True).
+    """
+    if persist:
+        os.makedirs(output_folder, exist_ok=True)
+    images = [None] * len(script_data["scenes"])
 
     print("🎨 Generating Images (Key-Aware Stable Mode)")
 
     style_seed = random.randint(10000, 99999)
 
-    # Threading logic
-    if hf_token or cf_api_token:
-        max_workers = 4
-    else:
-        max_workers = 2 if pollinations_api_key else 1
+    # One thread per scene; the process-wide governor decides how many
+    # requests and decodes actually run at once across all sessions
+    max_workers = max(1, len(script_data["scenes"]))
 
     def process_scene(index, scene):
-        filename = os.path.join(output_folder, f"scene_{index}.jpg")
+        filename = os.path.join(output_folder, f"scene_{index}.jpg") if persist else None
         prompt = build_prompt(scene["image_prompt"], style_seed)
 
         print(f"   🎬 Scene {index + 1}")
-        engine = generate_image(
+        engine, artifact = generate_image(
             prompt,
             filename,
             seed=style_seed + index,
             hf_token=hf_token,
             cf_account_id=cf_account_id,
             cf_api_token=cf_api_token,
-            pollinations_api_key=pollinations_api_key
+            pollinations_api_key=pollinations_api_key,
+            hedge=hedge
         )
 
         print(f"      ✅ Generated via {engine}")
-        return index, filename
+        return index, artifact
 
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         futures = [
@@ -212,7 +423,9 @@ def generate_images(
         ]
 
         for future in as_completed(futures):
-            idx, path = future.result()
-            image_paths[idx] = path
+            idx, artifact = future.result()
+            images[idx] = artifact
 
-    return image_paths
+    if return_artifacts:
+        return images
+    return [artifact.path for artifact in images]
@@ -0,0 +1,335 @@
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+from contextlib import ExitStack
+import numpy as np
+import imageio_ffmpeg
+from PIL import Image, ImageOps
+from moviepy import VideoFileClip
+from artifacts import as_artifact, local_paths
+from governor import governor
+from image_generator import RENDER_SIZE, NORMALIZED_SIZE
+from video_maker import ensure_assets_exist, create_text_image, ken_burns_box, scene_duration, scene_timing
+
+# ============================================================
+# OUTPUT PROFILES
+# ============================================================
+
+# kind: "video" (H.264 mp4), "gif" (short teaser) or "image" (single JPEG frame)
+# caption: create_text_image layout for that shape, or None for no captions
+OUTPUT_PROFILES = {
+    "landscape": {
+        "kind": "video", "size": RENDER_SIZE, "fps": 24, "crf": 23, "preset": "veryfast",
+        "caption": {"font_size": 25, "wrap": 30, "side_margin": 40, "bottom_margin": 50},
+        "suffix": ".mp4"
+    },
+    "vertical": {
+        "kind": "video", "size": (1080, 1920), "fps": 24, "crf": 24, "preset": "veryfast",
+        # Larger type, narrower wrap, raised clear of the Shorts/Reels UI
+        "caption": {"font_size": 48, "wrap": 22, "side_margin": 60, "bottom_margin": 420},
+        "suffix": "_vertical.mp4"
+    },
+    "thumbnail": {
+        "kind": "image", "size": (640, 360), "at": 1.0,
+        "caption": None,
+        "suffix": "_thumb.jpg"
+    },
+    "teaser": {
+        "kind": "gif", "size": (480, 270), "fps": 8, "max_duration": 4.0,
+        "caption": {"font_size": 12, "wrap": 30, "side_margin": 15, "bottom_margin": 15},
+        "suffix": "_teaser.gif"
+    }
+}
+
+QUEUE_DEPTH = 8   # frames buffered per rendition before the decoder waits
+CROSSFADE = 0.5   # fade-from-black at the start of each scene
+
+def fit_box(box, aspect):
+    """
+    Largest centered window of the given aspect ratio inside box.
+    """
+    left, top, right, bottom = box
+    width, height = right - left, bottom - top
+    if width / height > aspect:
+        crop_w = height * aspect
+        left += (width - crop_w) / 2
+        return (left, top, left + crop_w, bottom)
+    crop_h = width / aspect
+    top += (height - crop_h) / 2
+    return (left, top, right, top + crop_h)
+
+def caption_band(text, font_en, font_hi, size, layout):
+    """
+    Pre-rendered caption for one profile, reduced to the rows it covers:
+    (y0, y1, rgb, alpha) so compositing touches only those rows.
+    """
+    overlay = create_text_image(text, font_en, font_hi, size=size, layout=layout)
+    rows = np.nonzero(overlay[:, :, 3].any(axis=1))[0]
+    if rows.size == 0:
+        return None
+    y0, y1 = rows[0], rows[-1] + 1
+    band = overlay[y0:y1]
+    return y0, y1, band[:, :, :3].astype(np.uint16), band[:, :, 3:].astype(np.uint16)
+
+def caption_cues(scene, audio, duration, word_captions, group=3):
+    """
+    (start, end, text) caption cues for a scene: the static overlay, or
+    small word groups from the TTS timings.
+    """
+    timing = scene_timing(audio)
+    if not (word_captions and timing and timing["words"]):
+        return [(0, duration, scene["text_overlay"])]
+    words = timing["words"]
+    cues = []
+    for i in range(0, len(words), group):
+        end = words[i + group]["start"] if i + group < len(words) else duration
+        cues.append((words[i]["start"], end, " ".join(w["text"] for w in words[i:i + group])))
+    return cues
+
+# ============================================================
+# SHARED AUDIO TRACK
+# ============================================================
+
+def build_audio_track(audio_paths, durations, music_path, output_path):
+    """
+    Voices padded to their scene lengths, concatenated and mixed with the
+    background music once; every video rendition stream-copies this track.
+    """
+    cmd = [imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error"]
+    for path in audio_paths:
+        cmd += ["-i", path]
+    filters = [
+        f"[{i}:a]aformat=sample_rates=44100:channel_layouts=stereo,apad,atrim=0:{d:.3f},asetpts=N/SR/TB[v{i}]"
+        for i, d in enumerate(durations)
+    ]
+    filters.append("".join(f"[v{i}]" for i in range(len(durations))) + f"concat=n={len(durations)}:v=0:a=1[voice]")
+
+    if music_path and os.path.exists(music_path):
+        cmd += ["-stream_loop", "-1", "-i", music_path]
+        filters.append(f"[{len(audio_paths)}:a]volume=0.15[bgm];[voice][bgm]amix=inputs=2:duration=first:normalize=0[a]")
+        out = "[a]"
+    else:
+        out = "[voice]"
+
+    cmd += ["-filter_complex", ";".join(filters), "-map", out, "-c:a", "aac", output_path]
+    subprocess.run(cmd, check=True, capture_output=True)
+
+# ============================================================
+# PER-PROFILE WRITERS
+# ============================================================
+
+class RenditionWriter:
+    """
+    Consumes shared source frames for one profile on its own thread:
+    aspect-aware crop+scale, captions, fade, then encode.
+    Frames are taken from the shared timeline at the profile's own fps.
+    """
+    def __init__(self, name, profile, output_path, audio_path, captions):
+        self.name = name
+        self.profile = profile
+        self.output_path = output_path
+        self.audio_path = audio_path
+        self.captions = captions        # per scene: [(start, end, band)]
+        self.size = profile["size"]
+        self.aspect = self.size[0] / self.size[1]
+        self.frames = queue.Queue(maxsize=QUEUE_DEPTH)
+        self.emitted = 0
+        self.done = False
+        self.error = None
+        self.writer = None
+        self.gif_frames = []
+        self.thread = threading.Thread(target=self.run, name=f"rendition-{name}", daemon=True)
+
+    def start(self):
+        if self.profile["kind"] == "video":
+            self.writer = imageio_ffmpeg.write_frames(
+                self.output_path,
+                self.size,
+                fps=self.profile["fps"],
+                codec="libx264",
+                quality=None,
+                macro_block_size=2,
+                ffmpeg_log_level="error",
+                output_params=[
+                    "-crf", str(self.profile["crf"]),
+                    "-preset", self.profile["preset"],
+                    # One core per encoder; the pass holds one CPU slot per video writer
+                    "-threads", "1",
+                    "-movflags", "+faststart"
+                ],
+                audio_path=self.audio_path,
+                audio_codec="copy"
+            )
+            self.writer.send(None)
+        self.thread.start()
+
+    def render(self, source, box, scene_index, t):
+        frame = np.array(source.resize(self.size, Image.BILINEAR, box=fit_box(box, self.aspect)))
+        for start, end, band in self.captions[scene_index]:
+            if band is not None and start <= t < end:
+                y0, y1, rgb, alpha = band
+                rows = frame[y0:y1].astype(np.uint16)
+                frame[y0:y1] = ((rows * (255 - alpha) + rgb * alpha) // 255).astype(np.uint8)
+        if t < CROSSFADE:
+            frame = (frame * (t / CROSSFADE)).astype(np.uint8)
+        return frame
+
+    def consume(self, timestamp, source, box, scene_index, t):
+        kind = self.profile["kind"]
+        if kind == "image":
+            if timestamp >= self.profile["at"]:
+                Image.fromarray(self.render(source, box, scene_index, t)).save(self.output_path, quality=90)
+                self.done = True
+            return
+
+        if kind == "gif" and timestamp >= self.profile["max_duration"]:
+            self.done = True
+            return
+
+        # Emit as many frames as this profile's fps needs up to the shared timestamp
+        frame = None
+        while timestamp + 1e-6 >= self.emitted / self.profile["fps"]:
+            if frame is None:
+                frame = self.render(source, box, scene_index, t)
+            if kind == "video":
+                self.writer.send(frame)
+            else:
+                self.gif_frames.append(Image.fromarray(frame))
+            self.emitted += 1
+
+    def run(self):
+        while True:
+            item = self.frames.get()
+            if item is None:
+                break
+            # Keep draining after a failure or once finished so the decoder never blocks
+            if self.done or self.error:
+                continue
+            try:
+                self.consume(*item)
+            except Exception as e:
+                self.error = e
+
+    def finish(self):
+        self.frames.put(None)
+        self.thread.join()
+        try:
+            if self.writer is not None:
+                self.writer.close()
+            if self.profile["kind"] == "gif" and self.gif_frames and not self.error:
+                self.gif_frames[0].save(
+                    self.output_path,
+                    save_all=True,
+                    append_images=self.gif_frames[1:],
+                    duration=round(1000 / self.profile["fps"]),
+                    loop=0,
+                    optimize=True
+                )
+        except Exception as e:
+            self.error = self.error or e
+        if self.error:
+            print(f"   ❌ {self.name} rendition failed: {self.error}")
+            return None
+        return self.output_path if os.path.exists(self.output_path) else None
+
+# ============================================================
+# SINGLE-PASS RENDER
+# ============================================================
+
+def scene_source(media, duration, files):
+    """
+    Decoded scene source: returns frame_at(t) -> (PIL image, source-space window).
+    Still images are decoded once and zoomed; clips are decoded frame by frame
+    from a file kept on disk until the `files` ExitStack closes.
+    """
+    if media.kind == "video":
+        clip = VideoFileClip(files.enter_context(media.local_path()))
+
+        def video_frame(t):
+            image = Image.fromarray(clip.get_frame(t % clip.duration))
+            return image, (0, 0, image.width, image.height)
+        return video_frame, clip
+
+    image = media.to_image()
+    if image.size != NORMALIZED_SIZE:
+        image = ImageOps.fit(image, NORMALIZED_SIZE, method=Image.LANCZOS)
+    return (lambda t: (image, ken_burns_box(image.size, t, duration))), None
+
+def create_renditions(media_paths, audio_paths, script_data, output_stem, profiles=("landscape",), word_captions=False):
+    """
+    Renders every requested output profile from one pass over the scene sources.
+    Each source frame is decoded/zoomed once and fanned out to one writer per
+    profile, which crops it to its own aspect, lays out its own captions and
+    encodes in parallel with the others. Returns {profile: path or None}.
+    """
+    font_en, font_hi, music_path = ensure_assets_exist()
+    os.makedirs(os.path.dirname(os.path.abspath(output_stem)), exist_ok=True)
+
+    scenes = []
+    for media, audio, scene in zip(media_paths, audio_paths, script_data['scenes']):
+        media = as_artifact(media, "video" if str(media).endswith(".mp4") else "image")
+        audio = as_artifact(audio, "audio")
+        if media is None or not media.exists() or audio is None:
+            continue
+        scenes.append((media, audio, scene, scene_duration(audio)))
+    if not scenes:
+        return {}
+
+    fd, track_path = tempfile.mkstemp(suffix=".m4a", prefix="track_")
+    os.close(fd)
+    sources = []
+    writers = []
+    files = ExitStack()
+    try:
+        with local_paths([a for _, a, _, _ in scenes]) as voice_paths:
+            build_audio_track(voice_paths, [d for _, _, _, d in scenes], music_path, track_path)
+
+        for name in profiles:
+            profile = OUTPUT_PROFILES[name]
+            captions = []
+            for media, audio, scene, duration in scenes:
+                cues = caption_cues(scene, audio, duration, word_captions) if profile["caption"] else []
+                captions.append([
+                    (start, end, caption_band(text, font_en, font_hi, profile["size"], profile["caption"]))
+                    for start, end, text in cues
+                ])
+            writers.append(RenditionWriter(name, profile, f"{output_stem}{profile['suffix']}", track_path, captions))
+
+        print(f"🎬 Rendering {', '.join(profiles)} in one pass...")
+        fps = max(OUTPUT_PROFILES[name].get("fps", 1) for name in profiles)
+
+        # Slots are taken for the whole pass at once: the writers feed off a shared
+        # decoder, so acquiring them per writer could stall it behind a queued one
+        video_writers = sum(1 for w in writers if w.profile["kind"] == "video")
+        with governor.cpu.slot("renditions", weight=max(1, video_writers)):
+            for writer in writers:
+                writer.start()
+
+            offset = 0.0
+            for index, (media, audio, scene, duration) in enumerate(scenes):
+                frame_at, clip = scene_source(media, duration, files)
+                if clip is not None:
+                    sources.append(clip)
+                for i in range(round(duration * fps)):
+                    t = i / fps
+                    source, box = frame_at(t)
+                    for writer in writers:
+                        writer.frames.put((offset + t, source, box, index, t))
+                offset += duration
+
+            return {writer.name: writer.finish() for writer in writers}
+    except Exception as e:
+        print(f"❌ Rendition Error: {e}")
+        return {}
+    finally:
+        # Reap writers left running by an error mid-pass
+        for writer in writers:
+            if writer.thread.is_alive():
+                writer.finish()
+        for clip in sources:
+            clip.close()
+        files.close()
+        if os.path.exists(track_path):
+            os.remove(track_path)
@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from artifacts import Artifact
+
+# ============================================================
+# CACHE SETTINGS
+# ============================================================
+
+CACHE_DIR = os.path.join("assets", "cache")
+MAX_CACHE_BYTES = 2 * 1024 ** 3   # LRU-evicted beyond this
+
+def digest(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:20]
+
+def content_hash(article_data):
+    return digest({"title": article_data["title"], "text": article_data["text"]})
+
+# ============================================================
+# PIPELINE RESULT CACHE
+# ============================================================
+
+class ResultCache:
+    """
+    End-to-end memoization of pipeline runs.
+    The final videos are keyed on every input; intermediate stages (script,
+    audio, images) are keyed only on what they depend on, so a run whose
+    inputs partly changed still reuses the unchanged stages.
+    """
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.lock = threading.Lock()
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    self.manifest = json.load(f)
+            except Exception as e:
+                print(f"⚠️ Cache manifest unreadable, starting fresh: {e}")
+
+    # --- storage -------------------------------------------------
+
+    def _save(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key)
+
+    def _drop(self, key):
+        self.manifest.pop(key, None)
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def _evict(self):
+        total = sum(e["size"] for e in self.manifest.values())
+        for key in sorted(self.manifest, key=lambda k: self.manifest[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= self.manifest[key]["size"]
+            self._drop(key)
+
+    def _get(self, key):
+        with self.lock:
+            entry = self.manifest.get(key)
+            if entry is None:
+                return None
+            paths = {name: os.path.join(self._entry_dir(key), name) for name in entry["files"]}
+            if not all(os.path.exists(p) for p in paths.values()):
+                self._drop(key)
+                self._save()
+                return None
+            entry["last_used"] = time.time()
+            self._save()
+            return paths
+
+    def _put(self, key, kind, files, url=None):
+        """
+        files: {name: bytes | source file path}
+        """
+        entry_dir = self._entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+        size = 0
+        for name, payload in files.items():
+            target = os.path.join(entry_dir, name)
+            if isinstance(payload, bytes):
+                with open(target, "wb") as f:
+                    f.write(payload)
+            else:
+                shutil.copyfile(payload, target)
+            size += os.path.getsize(target)
+
+        with self.lock:
+            self.manifest[key] = {
+                "kind": kind,
+                "url": url,
+                "files": list(files),
+                "size": size,
+                "last_used": time.time()
+            }
+            self._evict()
+            self._save()
+
+    def invalidate(self, url=None, key=None):
+        """
+        Drops one entry, every entry recorded for a URL, or everything.
+        """
+        with self.lock:
+            if key is not None:
+                keys = [key]
+            elif url is not None:
+                keys = [k for k, e in self.manifest.items() if e.get("url") == url]
+            else:
+                keys = list(self.manifest)
+            for k in keys:
+                self._drop(k)
+            self._save()
+        return len(keys)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.manifest),
+                "bytes": sum(e["size"] for e in self.manifest.values())
+            }
+
+    # --- final result --------------------------------------------
+
+    def result_key(self, article_data, url, language, extra_languages, gender, ai_motion, render_settings):
+        return "result_" + digest({
+            "url": url,
+            "content": content_hash(article_data),
+            "languages": [language] + sorted(extra_languages),
+            "gender": gender,
+            "ai_motion": ai_motion,
+            "render": render_settings
+        })
+
+    def get_result(self, key):
+        """
+        Returns {name: path} if this exact run was rendered before
+        (name is the language, or "<language>_<profile>" for extra renditions).
+        """
+        paths = self._get(key)
+        if paths is None:
+            return None
+        return {os.path.splitext(name)[0]: path for name, path in paths.items()}
+
+    def put_result(self, key, outputs, url=None):
+        files = {f"{name}{os.path.splitext(path)[1]}": path for name, path in outputs.items() if path}
+        if files:
+            self._put(key, "result", files, url=url)
+
+    # --- stages --------------------------------------------------
+
+    def get_script(self, article_data, language):
+        paths = self._get("script_" + digest([content_hash(article_data), language]))
+        if paths is None:
+            return None
+        with open(paths["script.json"], "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def put_script(self, article_data, language, script_data, url=None):
+        payload = json.dumps(script_data, ensure_ascii=False).encode("utf-8")
+        self._put("script_" + digest([content_hash(article_data), language]), "script", {"script.json": payload}, url=url)
+
+    def _audio_key(self, script_data, language, gender):
+        return "audio_" + digest([[s["narration"] for s in script_data["scenes"]], language, gender])
+
+    def get_audio(self, script_data, language, gender):
+        paths = self._get(self._audio_key(script_data, language, gender))
+        if paths is None:
+            return None
+        artifacts = []
+        for i in range(len(script_data["scenes"])):
+            artifact = Artifact.from_path(paths[f"voice_{i}.mp3"], "audio")
+            with open(paths[f"voice_{i}.json"], "r", encoding="utf-8") as f:
+                artifact.metadata["timing"] = json.load(f)
+            artifacts.append(artifact)
+        return artifacts
+
+    def put_audio(self, script_data, language, gender, artifacts, url=None):
+        if not artifacts or any(a is None for a in artifacts):
+            return
+        files = {}
+        for i, artifact in enumerate(artifacts):
+            files[f"voice_{i}.mp3"] = artifact.to_bytes()
+            files[f"voice_{i}.json"] = json.dumps(artifact.metadata.get("timing")).encode("utf-8")
+        self._put(self._audio_key(script_data, language, gender), "audio", files, url=url)
+
+    def _images_key(self, script_data):
+        return "images_" + digest([s["image_prompt"] for s in script_data["scenes"]])
+
+    def get_images(self, script_data):
+        paths = self._get(self._images_key(script_data))
+        if paths is None:
+            return None
+        return [Artifact.from_path(paths[f"scene_{i}.jpg"], "image") for i in range(len(script_data["scenes"]))]
+
+    def put_images(self, script_data, artifacts, url=None):
+        if not artifacts or any(a is None for a in artifacts):
+            return
+        # Placeholder frames are not worth keeping
+        if any(a.metadata.get("engine") == "Placeholder" for a in artifacts):
+            return
+        files = {f"scene_{i}.jpg": a.to_bytes() for i, a in enumerate(artifacts)}
+        self._put(self._images_key(script_data), "images", files, url=url)
+
+# ============================================================
+# SHARED INSTANCE (survives Streamlit reruns)
+# ============================================================
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_result_cache(root=CACHE_DIR):
+    with _caches_lock:
+        if root not in _caches:
+            _caches[root] = ResultCache(root)
+        return _caches[root]
@@ -1,7 +1,20 @@
-import requests
 from bs4 import BeautifulSoup
+from html.parser import HTMLParser
+import codecs
+import urllib.parse
+from clients import get_session
+from governor import governor
 import time
 
+# Only this much clean text is ever used downstream (script_generator reads 2000)
+ARTICLE_CHAR_LIMIT = 3500
+
+# Hard cap on bytes read from a single page in streaming mode
+MAX_STREAM_BYTES = 2 * 1024 * 1024
+STREAM_CHUNK_SIZE = 16 * 1024
+
+SKIP_TAGS = {"script", "style", "nav", "footer", "header", "aside", "form", "iframe", "svg"}
+
 def resolve_google_url(url):
     """
     Extracts the actual news URL from a Google News RSS redirect link.
@@ -15,7 +28,8 @@ def resolve_google_url(url):
 
     try:
         # Get the redirection page content
-        response = requests.get(url, headers=headers, timeout=10)
+        with governor.io.slot("scrape"):
+            response = get_session(urllib.parse.urlparse(url).netloc).get(url, headers=headers, timeout=10)
         
         # Parse the HTML to find the destination link
         soup = BeautifulSoup(response.text, 'html.parser')
@@ -37,10 +51,146 @@ def resolve_google_url(url):
         print(f"   ⚠️ URL Resolution Warning: {e}")
         return url
 
-def scrape_article(url):
+def is_clean_paragraph(text):
+    # Filter out short/empty lines and common footer text
+    return len(text.split()) > 6 and "copyright" not in text.lower()
+
+class StreamingArticleParser(HTMLParser):
+    """
+    Incremental HTML parser that collects the title and clean paragraphs
+    as chunks arrive, so the download can stop once enough text is found.
+    """
+    def __init__(self, char_limit=ARTICLE_CHAR_LIMIT):
+        super().__init__(convert_charrefs=True)
+        self.char_limit = char_limit
+        self.skip_depth = 0
+        self.h1 = None
+        self.title = None
+        self.paragraphs = []
+        self.text_length = 0
+        self._capture = None   # "h1", "title" or "p" while inside that tag
+        self._buffer = []
+
+    @property
+    def done(self):
+        return self.text_length >= self.char_limit
+
+    def _flush(self):
+        text = "".join(self._buffer).strip()
+        if self._capture == "p" and is_clean_paragraph(text):
+            # +1 accounts for the joining space
+            self.text_length += len(text) + (1 if self.paragraphs else 0)
+            self.paragraphs.append(text)
+        elif self._capture == "h1" and text and self.h1 is None:
+            self.h1 = text
+        elif self._capture == "title" and text and self.title is None:
+            self.title = text
+        self._capture = None
+        self._buffer = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+            return
+        if self.skip_depth:
+            return
+        if tag in ("p", "h1", "title"):
+            # Unclosed <p> tags are implicitly closed by the next one
+            if self._capture:
+                self._flush()
+            self._capture = tag
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+        if not self.skip_depth and tag == self._capture:
+            self._flush()
+
+    def handle_data(self, data):
+        if self._capture and not self.skip_depth:
+            self._buffer.append(data)
+
+    def result(self, complete=True):
+        """
+        complete=False when the stream was cut off: a paragraph still open
+        at that point is half-received and is dropped rather than flushed.
+        """
+        if self._capture:
+            if complete or self._capture != "p":
+                self._flush()
+        return {
+            "title": self.h1 or self.title or "News Article",
+            "text": " ".join(self.paragraphs)
+        }
+
+def extract_streaming(response, max_bytes=MAX_STREAM_BYTES):
+    """
+    Feeds the response body to StreamingArticleParser chunk by chunk.
+    Stops at max_bytes or as soon as ARTICLE_CHAR_LIMIT chars of text are collected.
+    """
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    parser = StreamingArticleParser()
+    bytes_read = 0
+    complete = True
+
+    for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+        if not chunk:
+            continue
+        bytes_read += len(chunk)
+        parser.feed(decoder.decode(chunk))
+        if parser.done:
+            print(f"   ⏹️ Early cutoff after {bytes_read // 1024} KB")
+            complete = False
+            break
+        if bytes_read >= max_bytes:
+            print(f"   ⚠️ Byte cap reached ({max_bytes // 1024} KB)")
+            complete = False
+            break
+
+    if complete:
+        parser.feed(decoder.decode(b"", final=True))
+        parser.close()
+    return parser.result(complete)
+
+def extract_full(html):
+    """
+    Parses the whole DOM and extracts the title and clean paragraphs.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Clean up unwanted tags
+    for tag in soup(list(SKIP_TAGS)):
+        tag.decompose()
+
+    # EXTRACT TITLE
+    title = None
+    if soup.find('h1'):
+        title = soup.find('h1').get_text().strip()
+    elif soup.find('title'):
+        title = soup.find('title').get_text().strip()
+
+    if not title:
+        title = "News Article"
+
+    # EXTRACT TEXT
+    clean_paragraphs = []
+    for p in soup.find_all('p'):
+        text = p.get_text().strip()
+        if is_clean_paragraph(text):
+            clean_paragraphs.append(text)
+
+    return {
+        "title": title,
+        "text": " ".join(clean_paragraphs)
+    }
+
+def scrape_article(url, streaming=True, max_bytes=MAX_STREAM_BYTES):
     """
     Scrapes the article title and text.
     Includes logic to resolve Google News redirects.
+    In streaming mode the body is read incrementally with a hard byte cap
+    and the download stops once enough article text has been collected.
     """
     # 1. RESOLVE REAL URL
     target_url = resolve_google_url(url)
@@ -56,37 +206,25 @@ def scrape_article(url):
     }
 
     try:
-        session = requests.Session()
-        response = session.get(target_url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
+        # Keep-alive connections are reused across articles from the same site
+        session = get_session(urllib.parse.urlparse(target_url).netloc)
+
         # 2. PARSE CONTENT
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Clean up unwanted tags
-        for tag in soup(["script", "style", "nav", "footer", "header", "aside", "form", "iframe", "svg"]):
-            tag.decompose()
-
-        # 3. EXTRACT TITLE
-        title = None
-        if soup.find('h1'):
-            title = soup.find('h1').get_text().strip()
-        elif soup.find('title'):
-            title = soup.find('title').get_text().strip()
-        
-        if not title:
-            title = "News Article"
-
-        # 4. EXTRACT TEXT
-        paragraphs = soup.find_all('p')
-        clean_paragraphs = []
-        for p in paragraphs:
-            text = p.get_text().strip()
-            # Filter out short/empty lines and common footer text
-            if len(text.split()) > 6 and "copyright" not in text.lower():
-                clean_paragraphs.append(text)
-        
-        full_text = " ".join(clean_paragraphs)
+        if streaming:
+            # Download and parse are interleaved, so the whole stream counts as I/O
+            with governor.io.slot("scrape"):
+                with session.get(target_url, headers=headers, timeout=15, stream=True) as response:
+                    response.raise_for_status()
+                    article = extract_streaming(response, max_bytes=max_bytes)
+        else:
+            with governor.io.slot("scrape"):
+                response = session.get(target_url, headers=headers, timeout=15)
+                response.raise_for_status()
+            with governor.cpu.slot("parse"):
+                article = extract_full(response.text)
+
+        title = article["title"]
+        full_text = article["text"]
         
         # Validation
         if len(full_text) < 200:
@@ -97,7 +235,8 @@ def scrape_article(url):
         
         return {
             "title": title,
-            "text": full_text[:3500] 
+            "text": full_text[:ARTICLE_CHAR_LIMIT],
+            "url": target_url
         }
 
     except Exception as e:
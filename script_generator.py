@@ -1,13 +1,24 @@
 import json
 import os
 from groq import Groq
+from clients import get_client, HEALTH_CHECK_TIMEOUT
+from governor import governor
+
+def check_groq_client(client):
+    # Lightweight authenticated request; no tokens are spent
+    client.with_options(timeout=HEALTH_CHECK_TIMEOUT, max_retries=0).models.list()
+    return True
+
+def get_groq_client(api_key):
+    # Pooled per API key instead of rebuilt for every script
+    return get_client("groq", "api.groq.com", api_key, lambda: Groq(api_key=api_key), check_groq_client)
 
 def generate_script(article_data, api_key, language="English"):
     """
     Generates a video script in the selected language.
     """
     try:
-        client = Groq(api_key=api_key)
+        client = get_groq_client(api_key)
         
         # specific instructions based on language
         if language == "Hindi":
@@ -80,19 +91,84 @@ EXPECTED JSON FORMAT:
 
 
 
-        response = client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": "You are a JSON assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            model="llama-3.3-70b-versatile",
-            temperature=0.5,
-            response_format={"type": "json_object"}, 
-        )
+        with governor.io.slot("llm"):
+            response = client.chat.completions.create(
+                messages=[
+                    {"role": "system", "content": "You are a JSON assistant."},
+                    {"role": "user", "content": prompt}
+                ],
+                model="llama-3.3-70b-versatile",
+                temperature=0.5,
+                response_format={"type": "json_object"}, 
+            )
 
         content = response.choices[0].message.content
         return json.loads(content)
 
     except Exception as e:
         print(f"❌ Groq Error: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def localize_script(script_data, api_key, language):
+    """
+    Rewrites narration and text_overlay of an existing script in another
+    language, keeping the exact scene structure and image prompts so the
+    visuals can be shared across language variants.
+    """
+    try:
+        client = get_groq_client(api_key)
+
+        source_scenes = [
+            {"narration": s["narration"], "text_overlay": s["text_overlay"]}
+            for s in script_data["scenes"]
+        ]
+
+        if language == "Hindi":
+            lang_instruction = "Write 'narration' and 'text_overlay' in natural news-style HINDI (Devanagari script)."
+        else:
+            lang_instruction = f"Write 'narration' and 'text_overlay' in fluent, professional {language}."
+
+        prompt = f"""
+You are localizing a short-form news video script.
+
+SOURCE SCENES (JSON):
+{json.dumps(source_scenes, ensure_ascii=False)}
+
+TASK:
+{lang_instruction}
+- Keep EXACTLY {len(source_scenes)} scenes in the same order.
+- Each narration stays 1 sentence with the same meaning.
+- Each text_overlay stays 3–5 words.
+
+JSON OUTPUT RULES (STRICT):
+1. Output MUST be valid JSON only
+2. Root key MUST be "scenes"
+3. Each scene has only "narration" and "text_overlay"
+"""
+
+        with governor.io.slot("llm"):
+            response = client.chat.completions.create(
+                messages=[
+                    {"role": "system", "content": "You are a JSON assistant."},
+                    {"role": "user", "content": prompt}
+                ],
+                model="llama-3.3-70b-versatile",
+                temperature=0.3,
+                response_format={"type": "json_object"},
+            )
+
+        localized = json.loads(response.choices[0].message.content)["scenes"]
+        if len(localized) != len(script_data["scenes"]):
+            print(f"❌ Localization Error: expected {len(script_data['scenes'])} scenes, got {len(localized)}")
+            return None
+
+        return {
+            "scenes": [
+                {**scene, "narration": loc["narration"], "text_overlay": loc["text_overlay"]}
+                for scene, loc in zip(script_data["scenes"], localized)
+            ]
+        }
+
+    except Exception as e:
+        print(f"❌ Groq Error: {e}")
+        return None
@@ -0,0 +1,290 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import numpy as np
+
+# ============================================================
+# MINHASH SETTINGS
+# ============================================================
+
+NUM_PERM = 64          # signature length
+BANDS = 16             # LSH bands (BANDS * ROWS must equal NUM_PERM)
+ROWS = 4
+SHINGLE_SIZE = 2       # word n-grams
+
+DEFAULT_THRESHOLD = 0.5
+DEFAULT_INDEX_PATH = os.path.join("assets", "story_index.json")
+
+MAX_ENTRIES = 5000
+MAX_AGE_DAYS = 14
+
+# Bump when the hash family changes; stored signatures from other versions are discarded
+SIGNATURE_VERSION = 2
+
+# Fixed seed so signatures stay comparable across runs
+_rng = np.random.RandomState(1337)
+_PERM_SEEDS = np.frombuffer(_rng.bytes(8 * NUM_PERM), dtype="<u8").copy()
+
+# ============================================================
+# SIGNATURES
+# ============================================================
+
+def shingles(text):
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return set(words)
+    return {
+        " ".join(words[i:i + SHINGLE_SIZE])
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+def shingle_hash(gram):
+    return int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "little")
+
+def mix64(x):
+    """
+    splitmix64 finalizer; uint64 arithmetic wraps, which is what it relies on.
+    """
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def minhash_signature(text):
+    """
+    Returns a NUM_PERM-long MinHash signature for the text.
+    Each permutation is a 64-bit shingle hash XOR-ed with its own seed and
+    fully remixed, so the per-permutation orders are independent.
+    """
+    grams = shingles(text)
+    if not grams:
+        return np.zeros(NUM_PERM, dtype=np.uint64)
+
+    hashes = np.fromiter((shingle_hash(g) for g in grams), dtype=np.uint64, count=len(grams))
+    values = mix64(_PERM_SEEDS[:, None] ^ hashes[None, :])
+    return values.min(axis=1)
+
+def band_keys(signature):
+    return [
+        f"{b}:{hashlib.md5(signature[b * ROWS:(b + 1) * ROWS].tobytes()).hexdigest()[:16]}"
+        for b in range(BANDS)
+    ]
+
+def similarity(sig_a, sig_b):
+    """
+    Estimated Jaccard similarity between two signatures.
+    """
+    return float(np.mean(sig_a == sig_b))
+
+def normalize_settings(settings):
+    # JSON round-trip so stored and live settings compare equal (tuples vs lists)
+    return json.loads(json.dumps(settings, sort_keys=True)) if settings is not None else None
+
+def story_id_for(article_data):
+    text = f"{article_data.get('title', '')}\n{article_data.get('text', '')}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+# ============================================================
+# PERSISTENT INDEX
+# ============================================================
+
+class StoryIndex:
+    """
+    MinHash + LSH index over recently rendered stories.
+    Lookups only compare against stories sharing at least one band bucket.
+    """
+    def __init__(self, path=DEFAULT_INDEX_PATH, threshold=DEFAULT_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self.entries = {}
+        self.signatures = {}
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Story index unreadable, starting fresh: {e}")
+            return
+
+        if data.get("signature_version") != SIGNATURE_VERSION:
+            print("⚠️ Story index built with an older hash family, starting fresh")
+            return
+
+        for story_id, entry in data.get("entries", {}).items():
+            signature = np.array(entry.pop("signature"), dtype=np.uint64)
+            self._insert(story_id, entry, signature)
+        self._evict()
+
+    def save(self):
+        with self.lock:
+            payload = {
+                "signature_version": SIGNATURE_VERSION,
+                "entries": {
+                    story_id: {**entry, "signature": self.signatures[story_id].tolist()}
+                    for story_id, entry in self.entries.items()
+                }
+            }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def _insert(self, story_id, entry, signature):
+        self.entries[story_id] = entry
+        self.signatures[story_id] = signature
+        for key in band_keys(signature):
+            self.buckets.setdefault(key, set()).add(story_id)
+
+    def _remove(self, story_id):
+        entry = self.entries.pop(story_id, None)
+        signature = self.signatures.pop(story_id, None)
+        if signature is not None:
+            for key in band_keys(signature):
+                bucket = self.buckets.get(key)
+                if bucket:
+                    bucket.discard(story_id)
+                    if not bucket:
+                        del self.buckets[key]
+        return entry
+
+    def _evict(self):
+        cutoff = time.time() - MAX_AGE_DAYS * 86400
+        stale = [sid for sid, e in self.entries.items() if e.get("created", 0) < cutoff]
+        overflow = len(self.entries) - len(stale) - MAX_ENTRIES
+        if overflow > 0:
+            fresh = sorted(
+                (sid for sid in self.entries if sid not in stale),
+                key=lambda sid: self.entries[sid].get("created", 0)
+            )
+            stale.extend(fresh[:overflow])
+
+        for story_id in stale:
+            self._delete_outputs(self._remove(story_id))
+
+    @staticmethod
+    def _delete_outputs(entry):
+        # Rendered files are owned by the index
+        if not entry:
+            return
+        paths = set((entry.get("outputs") or {}).values())
+        paths.add(entry.get("video_path"))
+        for path in paths:
+            if path and os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def find_duplicate(self, article_data, language=None, exclude_urls=()):
+        """
+        Returns (entry, similarity) for the closest recent story above the
+        threshold, or (None, 0.0). Only stories in the same language match.
+        The story itself (same content or one of exclude_urls) is never its
+        own duplicate; exact reruns are the result cache's job.
+        """
+        signature = minhash_signature(f"{article_data['title']} {article_data['text']}")
+        current_id = story_id_for(article_data)
+        exclude_urls = {url for url in exclude_urls if url}
+
+        with self.lock:
+            candidates = set()
+            for key in band_keys(signature):
+                candidates |= self.buckets.get(key, set())
+
+            best, best_score = None, 0.0
+            for story_id in candidates:
+                entry = self.entries[story_id]
+                if language and entry.get("language") != language:
+                    continue
+                if entry.get("id") == current_id or entry.get("url") in exclude_urls:
+                    continue
+                score = similarity(signature, self.signatures[story_id])
+                if score > best_score:
+                    best, best_score = entry, score
+
+        if best is not None and best_score >= self.threshold:
+            return best, best_score
+        return None, 0.0
+
+    @staticmethod
+    def settings_match(entry, render_settings):
+        """
+        True if the entry's video was rendered with these settings and can stand in for a new render.
+        """
+        return entry.get("render_settings") == normalize_settings(render_settings)
+
+    @classmethod
+    def reusable_outputs(cls, entry, render_settings):
+        """
+        The entry's full output set ({name: path}, every language and rendition)
+        if it was rendered with these settings and every file still exists, else None.
+        """
+        outputs = entry.get("outputs") or ({entry["language"]: entry["video_path"]} if entry.get("video_path") else {})
+        if not outputs or not cls.settings_match(entry, render_settings):
+            return None
+        if not all(path and os.path.exists(path) for path in outputs.values()):
+            return None
+        return outputs
+
+    def add(self, article_data, language=None, url=None, video_path=None, script=None, render_settings=None, outputs=None):
+        """
+        Records a rendered story and persists the index.
+        render_settings: everything that shaped the video, checked before it is reused.
+        outputs: the run's full {name: path} output set, reused as a whole.
+        """
+        story_id = story_id_for(article_data)
+        # One entry per story and language
+        entry_key = f"{story_id}:{language}" if language else story_id
+        signature = minhash_signature(f"{article_data['title']} {article_data['text']}")
+        entry = {
+            "id": story_id,
+            "title": article_data["title"],
+            "url": url,
+            "language": language,
+            "created": time.time(),
+            "video_path": video_path,
+            "script": script,
+            "render_settings": normalize_settings(render_settings),
+            "outputs": outputs
+        }
+
+        with self.lock:
+            self._remove(entry_key)
+            self._insert(entry_key, entry, signature)
+            self._evict()
+
+        self.save()
+        return story_id
+
+    def invalidate(self, url=None):
+        """
+        Drops every entry recorded for a URL (or all entries) with their videos.
+        """
+        with self.lock:
+            story_ids = [sid for sid, e in self.entries.items() if url is None or e.get("url") == url]
+            for story_id in story_ids:
+                self._delete_outputs(self._remove(story_id))
+        self.save()
+        return len(story_ids)
+
+# ============================================================
+# SHARED INSTANCE (survives Streamlit reruns)
+# ============================================================
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_story_index(path=DEFAULT_INDEX_PATH):
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = StoryIndex(path)
+        return _indexes[path]
@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+from artifacts import Artifact
+from result_cache import ResultCache
+
+ARTICLE = {"title": "Budget announced", "text": "The finance minister presented the annual budget today."}
+SCRIPT = {
+    "scenes": [
+        {"narration": "The budget is out.", "image_prompt": "parliament building", "text_overlay": "Budget"},
+        {"narration": "Taxes are unchanged.", "image_prompt": "calculator on a desk", "text_overlay": "Taxes"}
+    ]
+}
+
+def audio_artifacts():
+    return [
+        Artifact("audio", data=f"mp3-{i}".encode(), fmt="MP3", metadata={"timing": {"duration": 1.0 + i, "words": []}})
+        for i in range(2)
+    ]
+
+def image_artifacts():
+    return [
+        Artifact.from_image(Image.new("RGB", (64, 36), (40 * i, 0, 0)), metadata={"engine": "HuggingFace"})
+        for i in range(2)
+    ]
+
+def test_stages_are_reused_independently(tmp_path):
+    cache = ResultCache(root=str(tmp_path))
+    cache.put_script(ARTICLE, "English", SCRIPT)
+    cache.put_audio(SCRIPT, "English", "Male", audio_artifacts())
+    cache.put_images(SCRIPT, image_artifacts())
+
+    assert cache.get_script(ARTICLE, "English") == SCRIPT
+    assert cache.get_script(ARTICLE, "Hindi") is None
+
+    audio = cache.get_audio(SCRIPT, "English", "Male")
+    assert [a.to_bytes() for a in audio] == [b"mp3-0", b"mp3-1"]
+    assert audio[1].metadata["timing"]["duration"] == 2.0
+    assert cache.get_audio(SCRIPT, "English", "Female") is None
+
+    # New narration invalidates the voice but not the images, which only depend on prompts
+    edited = {"scenes": [dict(SCRIPT["scenes"][0], narration="The budget is here."), SCRIPT["scenes"][1]]}
+    assert cache.get_audio(edited, "English", "Male") is None
+    images = cache.get_images(edited)
+    assert images is not None and images[1].to_array()[0, 0, 0] == 40
+
+def test_placeholder_images_are_not_cached(tmp_path):
+    cache = ResultCache(root=str(tmp_path))
+    images = image_artifacts()
+    images[0].metadata["engine"] = "Placeholder"
+    cache.put_images(SCRIPT, images)
+    assert cache.get_images(SCRIPT) is None
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResultCache(root=str(tmp_path), max_bytes=250)
+    for name in ("a", "b", "c"):
+        cache._put(name, "test", {"blob.bin": b"x" * 100})
+        time.sleep(0.01)
+        if name == "b":
+            # Touch "a" so "b" becomes the least recently used
+            assert cache._get("a") is not None
+            time.sleep(0.01)
+
+    assert cache._get("b") is None
+    assert cache._get("a") is not None
+    assert cache._get("c") is not None
+    assert not os.path.exists(os.path.join(str(tmp_path), "b"))
+
+def test_invalidate_by_url_key_and_all(tmp_path):
+    cache = ResultCache(root=str(tmp_path))
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"mp4")
+    key = cache.result_key(ARTICLE, "https://example.com/a", "English", [], "Male", False, {"fps": 24})
+    cache.put_result(key, {"English": str(video)}, url="https://example.com/a")
+    cache.put_script(ARTICLE, "English", SCRIPT, url="https://example.com/b")
+
+    assert set(cache.get_result(key)) == {"English"}
+    assert cache.invalidate(url="https://example.com/a") == 1
+    assert cache.get_result(key) is None
+    assert cache.get_script(ARTICLE, "English") == SCRIPT
+
+    assert cache.invalidate() == 1
+    assert cache.get_script(ARTICLE, "English") is None
+
+def test_manifest_survives_restart(tmp_path):
+    ResultCache(root=str(tmp_path)).put_script(ARTICLE, "English", SCRIPT)
+    assert ResultCache(root=str(tmp_path)).get_script(ARTICLE, "English") == SCRIPT
+
+def test_images_keep_their_pixels(tmp_path):
+    cache = ResultCache(root=str(tmp_path))
+    cache.put_images(SCRIPT, image_artifacts())
+    first = cache.get_images(SCRIPT)[0].to_array()
+    assert first.shape == (36, 64, 3) and np.all(first[..., 1:] == 0)
@@ -0,0 +1,89 @@
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from story_index import StoryIndex, minhash_signature, similarity, DEFAULT_THRESHOLD
+
+TITLE = "Government announces new electric vehicle policy"
+TEXT = (
+    "The government announced a new policy on electric vehicles in major cities "
+    "starting next month, officials said on Monday, aiming to reduce pollution and "
+    "encourage manufacturers to expand charging networks across the country."
+)
+
+def test_near_identical_texts_score_above_threshold():
+    # Seeded random articles with 3 of 60 words changed (true bigram Jaccard ~0.8)
+    rng = random.Random(7)
+    vocabulary = [f"word{i}" for i in range(5000)]
+    for _ in range(100):
+        words = rng.sample(vocabulary, 60)
+        edited = list(words)
+        for position in rng.sample(range(60), 3):
+            edited[position] = rng.choice(vocabulary)
+        score = similarity(minhash_signature(" ".join(words)), minhash_signature(" ".join(edited)))
+        assert score >= DEFAULT_THRESHOLD
+
+def test_unrelated_texts_score_low():
+    other = "Local football club wins the regional championship after a dramatic penalty shootout on Sunday evening."
+    assert similarity(minhash_signature(TEXT), minhash_signature(other)) < 0.2
+
+def test_find_duplicate_matches_edited_story(tmp_path):
+    index = StoryIndex(path=str(tmp_path / "index.json"))
+    index.add({"title": TITLE, "text": TEXT}, language="English", url="https://example.com/a")
+
+    edited = {"title": f"{TITLE} update", "text": TEXT.replace("next month", "this month")}
+    entry, score = index.find_duplicate(edited, "English")
+    assert entry is not None and entry["url"] == "https://example.com/a"
+    assert score >= DEFAULT_THRESHOLD
+
+    assert index.find_duplicate(edited, "Hindi") == (None, 0.0)
+
+def test_story_is_not_its_own_duplicate(tmp_path):
+    index = StoryIndex(path=str(tmp_path / "index.json"))
+    article = {"title": TITLE, "text": TEXT}
+    index.add(article, language="English", url="https://example.com/a")
+    assert index.find_duplicate(article, "English") == (None, 0.0)
+
+    edited = {"title": f"{TITLE} update", "text": TEXT.replace("next month", "this month")}
+    assert index.find_duplicate(edited, "English", exclude_urls=["https://example.com/a"]) == (None, 0.0)
+
+def test_reuse_requires_matching_settings(tmp_path):
+    index = StoryIndex(path=str(tmp_path / "index.json"))
+    settings = {"gender": "Male", "render": {"size": (1280, 720)}}
+    index.add({"title": TITLE, "text": TEXT}, language="English", url="https://example.com/a", render_settings=settings)
+
+    entry, _ = StoryIndex(path=str(tmp_path / "index.json")).find_duplicate(
+        {"title": f"{TITLE} update", "text": TEXT}, "English"
+    )
+    assert StoryIndex.settings_match(entry, settings)
+    assert not StoryIndex.settings_match(entry, dict(settings, gender="Female"))
+
+def test_invalidate_drops_url_entries(tmp_path):
+    index = StoryIndex(path=str(tmp_path / "index.json"))
+    index.add({"title": TITLE, "text": TEXT}, language="English", url="https://example.com/a")
+    assert index.invalidate(url="https://example.com/b") == 0
+    assert index.invalidate(url="https://example.com/a") == 1
+    assert index.find_duplicate({"title": f"{TITLE} update", "text": TEXT}, "English") == (None, 0.0)
+
+def test_reuse_returns_whole_output_set(tmp_path):
+    index = StoryIndex(path=str(tmp_path / "index.json"))
+    outputs = {}
+    for name in ("English", "Hindi", "English_vertical"):
+        outputs[name] = str(tmp_path / f"{name}.mp4")
+        open(outputs[name], "wb").close()
+    settings = {"languages": ["English", "Hindi"]}
+    index.add({"title": TITLE, "text": TEXT}, language="English", url="https://example.com/a",
+              video_path=outputs["English"], render_settings=settings, outputs=outputs)
+
+    entry, _ = index.find_duplicate({"title": f"{TITLE} update", "text": TEXT}, "English")
+    assert StoryIndex.reusable_outputs(entry, settings) == outputs
+    assert StoryIndex.reusable_outputs(entry, {"languages": ["English"]}) is None
+
+    # A missing rendition means the set cannot stand in for a new run
+    os.remove(outputs["Hindi"])
+    assert StoryIndex.reusable_outputs(entry, settings) is None
+
+    index.invalidate(url="https://example.com/a")
+    assert not os.path.exists(outputs["English_vertical"])
@@ -0,0 +1,86 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from script_generator import localize_script
+from audio_generator import generate_voiceover
+from video_maker import create_video, ensure_assets_exist
+from renditions import create_renditions
+
+def render_variant(media, script_data, language, gender, output_file, audio_items=None, word_captions=False, profiles=None):
+    """
+    TTS + encode for one language over the shared visuals.
+    With profiles, every rendition comes from one pass and {profile: path} is returned.
+    """
+    if audio_items is None:
+        audio_items = generate_voiceover(script_data, language, gender, persist=False, return_artifacts=True)
+    if profiles:
+        output_stem = os.path.splitext(output_file)[0]
+        return create_renditions(media, audio_items, script_data, output_stem, profiles=profiles, word_captions=word_captions)
+    return create_video(media, audio_items, script_data, output_file=output_file, word_captions=word_captions)
+
+def render_variants(
+    media,
+    base_script,
+    base_language,
+    languages,
+    gender,
+    api_key,
+    output_stem="output/final_video",
+    base_audio=None,
+    word_captions=False,
+    profiles=None
+):
+    """
+    Renders one video per language from a single visual plan.
+    Images/clips in `media` are generated and decoded once and shared by every
+    variant, so each extra language only costs a script localization, TTS and encode.
+    Returns {language: {"script": ..., "output": ..., "renditions": {profile: path}}};
+    "output" is the main video, "renditions" is only filled when profiles are requested.
+    """
+    scripts = {base_language: base_script}
+    extra = [lang for lang in languages if lang != base_language]
+
+    # 1. Localized scripts with the same scene structure
+    if extra:
+        print(f"🌐 Localizing script: {', '.join(extra)}")
+        with ThreadPoolExecutor(max_workers=len(extra)) as executor:
+            localized = dict(zip(extra, executor.map(lambda lang: localize_script(base_script, api_key, lang), extra)))
+        for lang, script in localized.items():
+            if script:
+                scripts[lang] = script
+            else:
+                print(f"   ⚠️ Skipping {lang} variant")
+
+    # Download fonts/music once before the parallel renders
+    ensure_assets_exist()
+
+    # 2. Per-language TTS + render, in parallel over the shared visuals
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(scripts)) as executor:
+        futures = {
+            lang: executor.submit(
+                render_variant,
+                media,
+                script,
+                lang,
+                gender,
+                f"{output_stem}_{lang}.mp4",
+                base_audio if lang == base_language else None,
+                word_captions,
+                profiles
+            )
+            for lang, script in scripts.items()
+        }
+        for lang, future in futures.items():
+            try:
+                output = future.result()
+            except Exception as e:
+                print(f"❌ {lang} variant failed: {e}")
+                output = None
+            if isinstance(output, dict):
+                # Main video: landscape if requested, else the first video rendition
+                main = output.get("landscape") or next((p for p in output.values() if p and p.endswith(".mp4")), None)
+                results[lang] = {"script": scripts[lang], "output": main, "renditions": output}
+            else:
+                results[lang] = {"script": scripts[lang], "output": output, "renditions": {}}
+
+    return results
@@ -1,10 +1,27 @@
-from moviepy import AudioFileClip, ImageClip, VideoFileClip, CompositeVideoClip, concatenate_videoclips, vfx, CompositeAudioClip, afx
-from PIL import Image, ImageDraw, ImageFont
+from moviepy import AudioFileClip, ImageClip, VideoClip, VideoFileClip, CompositeVideoClip, concatenate_videoclips, vfx, CompositeAudioClip, afx
+from PIL import Image, ImageDraw, ImageFont, ImageOps
 import numpy as np
 import textwrap
 import os
 import requests
 import re
+import json
+import time
+import hashlib
+import subprocess
+import tempfile
+import imageio_ffmpeg
+from artifacts import as_artifact, local_paths
+from audio_generator import load_timing
+from governor import governor
+from image_generator import RENDER_SIZE, NORMALIZED_SIZE, ZOOM_RATE, ZOOM_HEADROOM
+
+# Full render vs. fast low-res preview from the same inputs
+FULL_SETTINGS = {"size": RENDER_SIZE, "fps": 24, "crossfade": 0.5, "music": True}
+DRAFT_SETTINGS = {"size": (640, 360), "fps": 12, "crossfade": 0, "music": False}
+
+# Caption box geometry in output pixels; the default matches the 1280x720 render
+DEFAULT_CAPTION_LAYOUT = {"font_size": 25, "wrap": 30, "side_margin": 40, "bottom_margin": 50}
 
 def download_file(url, filepath):
     try:
@@ -41,20 +58,21 @@ def ensure_assets_exist():
 def is_hindi(text):
     return bool(re.search(r'[\u0900-\u097F]', text))
 
-def create_text_image(text, font_en, font_hi, size=(720, 560)):
+def create_text_image(text, font_en, font_hi, size=(720, 560), layout=None):
     """
     Creates text overlay with strict safety margins.
+    layout overrides the caption geometry (see DEFAULT_CAPTION_LAYOUT) for other output shapes.
     """
+    layout = dict(DEFAULT_CAPTION_LAYOUT, **(layout or {}))
     img = Image.new('RGBA', size, (255, 255, 255, 0))
     draw = ImageDraw.Draw(img)
     
     # 1. Choose Font
+    font_size = layout["font_size"]
     if is_hindi(text):
         selected_font_path = font_hi
-        font_size = 25 # Slightly larger for Hindi legibility
     else:
         selected_font_path = font_en
-        font_size = 25
 
     try:
         font = ImageFont.truetype(selected_font_path, font_size)
@@ -62,23 +80,24 @@ def create_text_image(text, font_en, font_hi, size=(720, 560)):
         font = ImageFont.load_default()
 
     # 2. SAFER WRAPPING (Crucial Fix)
-    # Wrap at 30 chars to ensure it fits 1280px width with margins
-    lines = textwrap.wrap(text, width=30)
+    # Default 30 chars to ensure it fits 1280px width with margins
+    lines = textwrap.wrap(text, width=layout["wrap"])
     
-    # 3. Calculate Box Dimensions
-    line_height = font_size + 20
-    padding_vertical = 30
+    # 3. Calculate Box Dimensions (45px lines / 30px padding at the default 25px font)
+    line_height = round(font_size * 1.8)
+    padding_vertical = round(font_size * 1.2)
     text_block_height = len(lines) * line_height
     box_height = text_block_height + (padding_vertical * 2)
     
     # 4. Position at Bottom with Safety Margin
-    # Leave 50px gap from the absolute bottom of video
-    box_y1 = size[1] - box_height - 50 
-    box_y2 = size[1] - 50
+    # Default 50px gap from the absolute bottom of video
+    box_y1 = size[1] - box_height - layout["bottom_margin"]
+    box_y2 = size[1] - layout["bottom_margin"]
     
     # Draw Semi-Transparent Box (Full width - 80px margins)
-    # x1=40, x2=1240 ensures 40px safety margin on left/right
-    draw.rectangle((40, box_y1, 1240, box_y2), fill=(0, 0, 0, 160))
+    # Default x1=40, x2=1240 at 1280px ensures 40px safety margin on left/right
+    margin = layout["side_margin"]
+    draw.rectangle((margin, box_y1, size[0] - margin, box_y2), fill=(0, 0, 0, 160))
     
     # 5. Draw Text Centered
     current_y = box_y1 + padding_vertical
@@ -97,46 +116,329 @@ def create_text_image(text, font_en, font_hi, size=(720, 560)):
 
     return np.array(img)
 
-def create_video(media_paths, audio_paths, script_data, output_file="output/final_video.mp4"):
+def create_caption_band(text, font_en, font_hi, width, scale=0.5):
+    """
+    Cheap draft caption: an opaque RGB strip that is copied over the bottom
+    rows of each frame instead of alpha-compositing a full-frame overlay.
+    """
+    font_size = max(10, round(25 * scale))
+    try:
+        font = ImageFont.truetype(font_hi if is_hindi(text) else font_en, font_size)
+    except:
+        font = ImageFont.load_default()
+
+    lines = textwrap.wrap(text, width=30)
+    line_height = font_size + round(20 * scale)
+    padding = round(15 * scale)
+    band = Image.new('RGB', (width, len(lines) * line_height + padding * 2), (0, 0, 0))
+    draw = ImageDraw.Draw(band)
+
+    current_y = padding
+    for line in lines:
+        bbox = draw.textbbox((0, 0), line, font=font)
+        draw.text(((width - (bbox[2] - bbox[0])) / 2, current_y), line, font=font, fill="white")
+        current_y += line_height
+
+    return np.array(band)
+
+def burn_caption(clip, band):
+    def burn(get_frame, t):
+        frame = np.array(get_frame(t))
+        frame[-band.shape[0]:] = band
+        return frame
+    return clip.transform(burn)
+
+def ken_burns_clip(image, duration, size=RENDER_SIZE):
+    """
+    Slow center zoom over a pre-normalized image (path or Artifact).
+    The image is decoded at most once; each frame is a single crop+scale of
+    that in-memory frame that only ever downsamples thanks to the zoom headroom.
+    """
+    source = as_artifact(image, "image").to_image()
+
+    # Images that bypassed generate_images (e.g. user supplied) are normalized here, once
+    if source.size != NORMALIZED_SIZE:
+        source = ImageOps.fit(source, NORMALIZED_SIZE, method=Image.LANCZOS)
+
+    def make_frame(t):
+        return np.asarray(source.resize(size, Image.BILINEAR, box=ken_burns_box(source.size, t, duration)))
+
+    return VideoClip(make_frame, duration=duration)
+
+def ken_burns_box(src_size, t, duration):
+    """
+    Source-space crop window of the zoom at time t.
+    At zoom 1 the whole image is visible, at max zoom a canvas-sized center crop.
+    Long scenes zoom slower so the headroom lasts the whole scene instead of freezing.
+    """
+    src_w, src_h = src_size
+    rate = min(ZOOM_RATE, ZOOM_HEADROOM / duration) if duration else ZOOM_RATE
+    zoom = min(1 + rate * t, 1 + ZOOM_HEADROOM)
+    crop_w = src_w / zoom
+    crop_h = src_h / zoom
+    left = (src_w - crop_w) / 2
+    top = (src_h - crop_h) / 2
+    return (left, top, left + crop_w, top + crop_h)
+
+def scene_timing(audio):
+    """
+    TTS timing record (duration + word offsets) from the artifact or its sidecar file.
+    """
+    timing = audio.metadata.get("timing")
+    if timing is None and audio.path:
+        timing = load_timing(audio.path)
+    return timing
+
+def scene_duration(audio):
+    timing = scene_timing(audio)
+    if timing:
+        return timing["duration"] + 0.5
+    # Legacy audio without a timing record: probe the file
+    with audio.local_path() as path, AudioFileClip(path) as probe:
+        return probe.duration + 0.5
+
+def word_caption_clips(words, duration, font_en, font_hi, size, group=3):
+    """
+    Word-synced captions: small groups of words shown while they are spoken.
+    """
+    clips = []
+    for i in range(0, len(words), group):
+        chunk = words[i:i + group]
+        start = chunk[0]["start"]
+        end = words[i + group]["start"] if i + group < len(words) else duration
+        txt_img = create_text_image(" ".join(w["text"] for w in chunk), font_en, font_hi, size=size)
+        clips.append(ImageClip(txt_img).with_start(start).with_duration(max(0.05, end - start)))
+    return clips
+
+def build_scene_clip(media, audio, scene, settings, font_en, font_hi, draft=False, fade="crossfade", with_audio=True):
+    """
+    Builds one scene (visual + caption + voice). Returns None if inputs are missing.
+    fade="crossfade" blends over the previous scene when composed;
+    fade="black" bakes a fade-from-black into standalone segments.
+    Scene length comes from the TTS timing record, so the mp3 is not probed.
+    Callers hold local_paths() over the audio and video media while the clip is in use.
+    """
+    width, height = settings["size"]
+
+    # Paths and in-memory Artifacts are both accepted
+    media = as_artifact(media, "video" if str(media).endswith(".mp4") else "image")
+    audio = as_artifact(audio, "audio")
+    if media is None or not media.exists() or audio is None:
+        return None
+        
+    duration = scene_duration(audio)
+    # ffmpeg reads audio from disk; in-memory audio gets a temp file
+    voice = AudioFileClip(audio.persist()) if with_audio else None
+    
+    # Video/Image Handling
+    if media.kind == "video":
+        visual = VideoFileClip(media.persist())
+        if visual.duration < duration: visual = vfx.Loop(visual, duration=duration)
+        else: visual = visual.with_duration(duration)
+        visual = visual.resized(height=height)
+    else:
+        visual = ken_burns_clip(media, duration, size=(width, height))
+
+    if draft:
+        band = create_caption_band(scene['text_overlay'], font_en, font_hi, width, scale=height / 720)
+        return burn_caption(visual, band).with_audio(voice)
+
+    # Create Text Overlay (word-synced from TTS timings when requested)
+    timing = scene_timing(audio)
+    if settings.get("word_captions") and timing and timing["words"]:
+        txt_clips = word_caption_clips(timing["words"], duration, font_en, font_hi, (width, height))
+    else:
+        txt_img = create_text_image(scene['text_overlay'], font_en, font_hi, size=(width, height))
+        txt_clips = [ImageClip(txt_img).with_duration(duration)]
+    
+    # Composite
+    final_scene = CompositeVideoClip([visual] + txt_clips).with_duration(duration).with_audio(voice)
+    if fade == "black":
+        return final_scene.with_effects([vfx.FadeIn(settings["crossfade"])])
+    return final_scene.with_effects([vfx.CrossFadeIn(settings["crossfade"])])
+
+# ============================================================
+# INCREMENTAL RENDERING (per-scene segment cache)
+# ============================================================
+
+SEGMENT_DIR = os.path.join("assets", "segments")
+SEGMENT_MAX_AGE_DAYS = 7
+# Bump when scene rendering changes so stale segments are not reused
+RENDER_VERSION = 3
+
+def scene_fingerprint(media, audio, scene, settings):
+    """
+    Hash of everything that affects a scene's encoded segment (media and audio are Artifacts).
+    """
+    parts = {
+        "version": RENDER_VERSION,
+        "media": media.content_hash(),
+        "media_kind": media.kind,
+        "audio": audio.content_hash(),
+        "text_overlay": scene["text_overlay"],
+        "zoom": [ZOOM_RATE, ZOOM_HEADROOM],
+        "settings": {k: settings.get(k) for k in ("size", "fps", "crossfade", "word_captions")}
+    }
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def prune_segments(segment_dir=SEGMENT_DIR):
+    cutoff = time.time() - SEGMENT_MAX_AGE_DAYS * 86400
+    for name in os.listdir(segment_dir):
+        path = os.path.join(segment_dir, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+def write_segment(clip, audio_path, segment_path, settings):
+    """
+    Encodes the silent scene, then lets ffmpeg mux the voice in directly
+    (padded to the scene length) instead of decoding it through Python.
+    Identical codec settings for every segment so they can be stream-copied together.
+    """
+    segment_dir = os.path.dirname(segment_path)
+    fd, tmp_video = tempfile.mkstemp(dir=segment_dir, suffix=".video.mp4")
+    os.close(fd)
+    fd, tmp_path = tempfile.mkstemp(dir=segment_dir, suffix=".part.mp4")
+    os.close(fd)
+    try:
+        clip.write_videofile(
+            tmp_video,
+            fps=settings["fps"],
+            codec="libx264",
+            audio=False,
+            threads=1,
+            preset="ultrafast",
+            ffmpeg_params=["-pix_fmt", "yuv420p"],
+            logger=None
+        )
+        subprocess.run([
+            imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error",
+            "-i", tmp_video, "-i", audio_path,
+            "-map", "0:v", "-map", "1:a",
+            "-c:v", "copy", "-c:a", "aac", "-ar", "44100", "-ac", "2",
+            "-af", "apad", "-t", f"{clip.duration:.3f}",
+            tmp_path
+        ], check=True, capture_output=True)
+        os.replace(tmp_path, segment_path)
+    finally:
+        for path in (tmp_video, tmp_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+def concat_segments(segment_paths, output_file, music_path=None):
+    """
+    Joins segments with the concat demuxer (no re-encode of video) and
+    mixes the background music in a single audio-only pass.
+    """
+    ffmpeg = imageio_ffmpeg.get_ffmpeg_exe()
+    list_path = f"{output_file}.txt"
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in segment_paths:
+            f.write(f"file '{os.path.abspath(path)}'\n")
+
+    cmd = [ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path]
+    if music_path and os.path.exists(music_path):
+        cmd += [
+            "-stream_loop", "-1", "-i", music_path,
+            "-filter_complex", "[1:a]volume=0.15[bgm];[0:a][bgm]amix=inputs=2:duration=first:normalize=0[a]",
+            "-map", "0:v", "-map", "[a]",
+            "-c:v", "copy", "-c:a", "aac"
+        ]
+    else:
+        cmd += ["-c", "copy"]
+    cmd += ["-movflags", "+faststart", output_file]
+
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+    finally:
+        os.remove(list_path)
+
+def create_video_incremental(media_paths, audio_paths, script_data, output_file, settings, font_en, font_hi, music_path, segment_dir=SEGMENT_DIR):
+    """
+    Renders each scene to a cached segment keyed by its fingerprint, re-encodes
+    only scenes whose inputs changed, then stream-copies segments together.
+    """
+    os.makedirs(segment_dir, exist_ok=True)
+    prune_segments(segment_dir)
+
+    segments = []
+    try:
+        for index, (media, audio, scene) in enumerate(zip(media_paths, audio_paths, script_data['scenes'])):
+            media = as_artifact(media, "video" if str(media).endswith(".mp4") else "image")
+            audio = as_artifact(audio, "audio")
+            if media is None or not media.exists() or audio is None:
+                continue
+
+            segment_path = os.path.join(segment_dir, f"{scene_fingerprint(media, audio, scene, settings)}.mp4")
+            if os.path.exists(segment_path):
+                print(f"   ♻️ Scene {index + 1}: cached segment")
+                os.utime(segment_path)
+            else:
+                print(f"   🎞️ Scene {index + 1}: encoding")
+                clip = build_scene_clip(media, audio, scene, settings, font_en, font_hi, fade="black", with_audio=False)
+                try:
+                    with audio.local_path() as audio_path, governor.cpu.slot("encode"):
+                        write_segment(clip, audio_path, segment_path, settings)
+                finally:
+                    clip.close()
+            segments.append(segment_path)
+
+        if not segments: return None
+
+        with governor.cpu.slot("mux"):
+            concat_segments(segments, output_file, music_path if settings["music"] else None)
+        return output_file
+    except Exception as e:
+        print(f"❌ Write Error: {e}")
+        return None
+
+def create_video(media_paths, audio_paths, script_data, output_file="output/final_video.mp4", draft=False, incremental=True, word_captions=False):
+    """
+    Assembles the final video. With draft=True renders a low-res, low-fps
+    preview (burned-in captions, no crossfades or music) from the same inputs.
+    Full renders are incremental by default: unchanged scenes reuse cached segments.
+    word_captions=True replaces the static overlay with captions synced to
+    the TTS word timings (full renders only).
+    """
     output_file = os.path.abspath(output_file)
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
     
     font_en, font_hi, music_path = ensure_assets_exist()
-    
+    settings = dict(DRAFT_SETTINGS if draft else FULL_SETTINGS, word_captions=word_captions and not draft)
+
+    media_items = [as_artifact(m, "video" if str(m).endswith(".mp4") else "image") for m in media_paths]
+    audio_items = [as_artifact(a, "audio") for a in audio_paths]
+    # ffmpeg reads voices and clips from disk; in-memory ones get temp files for this render only
+    on_disk = audio_items + [m for m in media_items if m is not None and m.kind == "video"]
+
+    with local_paths(on_disk):
+        if incremental and not draft:
+            print("🎬 Assembling Video (Incremental)...")
+            return create_video_incremental(
+                media_items, audio_items, script_data, output_file, settings, font_en, font_hi, music_path
+            )
+        return compose_video(media_items, audio_items, script_data, output_file, settings, font_en, font_hi, music_path, draft)
+
+def compose_video(media_paths, audio_paths, script_data, output_file, settings, font_en, font_hi, music_path, draft=False):
+    """
+    Single moviepy composition of all scenes (drafts and non-incremental full renders).
+    """
     clips = []
-    print(f"🎬 Assembling Video (Safe Text)...")
+    print(f"🎬 Assembling {'Draft' if draft else 'Video'} (Safe Text)...")
 
-    for media_path, audio_path, scene in zip(media_paths, audio_paths, script_data['scenes']):
-        if media_path is None or not os.path.exists(media_path): continue
-            
-        voice = AudioFileClip(audio_path)
-        duration = voice.duration + 0.5
-        
-        # Video/Image Handling
-        if media_path.endswith(".mp4"):
-            visual = VideoFileClip(media_path)
-            if visual.duration < duration: visual = vfx.Loop(visual, duration=duration)
-            else: visual = visual.with_duration(duration)
-            visual = visual.resized(height=720)
-        else:
-            visual = ImageClip(media_path).with_duration(duration)
-            visual = visual.resized(height=800).cropped(width=1280, height=720, x_center=640, y_center=360)
-            visual = visual.with_effects([vfx.Resize(lambda t: 1 + 0.04 * t)])
-
-        # Create Text Overlay
-        txt_img = create_text_image(scene['text_overlay'], font_en, font_hi, size=(1280, 720))
-        txt_clip = ImageClip(txt_img).with_duration(duration)
-        
-        # Composite
-        final_scene = CompositeVideoClip([visual, txt_clip]).with_audio(voice)
-        final_scene = final_scene.with_effects([vfx.CrossFadeIn(0.5)])
-        clips.append(final_scene)
+    for media, audio, scene in zip(media_paths, audio_paths, script_data['scenes']):
+        clip = build_scene_clip(media, audio, scene, settings, font_en, font_hi, draft=draft)
+        if clip is not None:
+            clips.append(clip)
         
     if not clips: return None
 
-    final_clip = concatenate_videoclips(clips, method="compose")
+    # Draft scenes share one size and have no fades, so plain chaining is enough
+    final_clip = concatenate_videoclips(clips, method="chain" if draft else "compose")
     
-    if os.path.exists(music_path):
+    if settings["music"] and os.path.exists(music_path):
         try:
             bgm = AudioFileClip(music_path)
             if bgm.duration < final_clip.duration: bgm = afx.AudioLoop(bgm, duration=final_clip.duration)
@@ -145,16 +447,21 @@ def create_video(media_paths, audio_paths, script_data, output_file="output/fina
         except: pass
 
     try:
-        final_clip.write_videofile(
-            output_file, 
-            fps=24, 
-            codec="libx264", 
-            audio_codec="aac", 
-            threads=1, 
-            preset="ultrafast", 
-            ffmpeg_params=["-pix_fmt", "yuv420p"]
-        )
+        with governor.cpu.slot("encode"):
+            final_clip.write_videofile(
+                output_file, 
+                fps=settings["fps"], 
+                codec="libx264", 
+                audio_codec="aac", 
+                threads=1, 
+                preset="ultrafast", 
+                ffmpeg_params=["-pix_fmt", "yuv420p"]
+            )
         return output_file
     except Exception as e:
         print(f"❌ Write Error: {e}")
-        return None
\ No newline at end of file
+        return None
+    finally:
+        final_clip.close()
+        for clip in clips:
+            clip.close()
\ No newline at end of file